@@ -9,9 +9,38 @@ __version__ = "1.0.0"
 __author__ = "Ayusynapse Team"
 __email__ = "contact@ayusynapse.com"
 
-from .matcher import *
-from .fhir import *
-from .api import *
+import importlib
+
+# Subpackages and their re-exports are imported on first attribute access
+# (PEP 562), so "import ayusynapse.settings" or "ayusynapse.matcher.rank"
+# doesn't also load the FHIR tooling and build the FastAPI app.
+_SUBPACKAGES = ("matcher", "fhir", "api", "models")
+
+_LAZY_ATTRIBUTES = {
+    # .matcher
+    "get_candidate_trials": ".matcher",
+    "Trial": ".matcher",
+    # .fhir
+    "extractor": ".fhir",
+    "converter": ".fhir",
+    "validator": ".fhir",
+    "fhir_storage": ".fhir",
+    "fhir_server_integration": ".fhir",
+    # .api
+    "match_api": ".api",
+}
+
+def __getattr__(name):
+    if name in _SUBPACKAGES:
+        return importlib.import_module(f".{name}", __name__)
+    if name in _LAZY_ATTRIBUTES:
+        value = getattr(importlib.import_module(_LAZY_ATTRIBUTES[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def __dir__():
+    return sorted(set(globals()) | set(_SUBPACKAGES) | set(_LAZY_ATTRIBUTES))
 
 __all__ = [
     # Version info
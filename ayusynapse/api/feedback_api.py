@@ -3,6 +3,7 @@ Feedback API - REST endpoints for collecting and retrieving feedback
 """
 
 import logging
+import threading
 from typing import Dict, List, Any, Optional
 from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel, Field
@@ -46,12 +47,21 @@ class FeedbackStatistics(BaseModel):
 # Create router
 router = APIRouter(prefix="/feedback", tags=["feedback"])
 
+# Shared feedback collector, created on first use
+_feedback_collector: Optional[FeedbackCollector] = None
+_feedback_collector_lock = threading.Lock()
+
 # Dependency to get feedback collector
 def get_feedback_collector() -> FeedbackCollector:
-    return FeedbackCollector()
+    global _feedback_collector
+    if _feedback_collector is None:
+        with _feedback_collector_lock:
+            if _feedback_collector is None:
+                _feedback_collector = FeedbackCollector()
+    return _feedback_collector
 
 @router.post("/collect", response_model=Dict[str, str])
-async def collect_feedback(
+def collect_feedback(
     feedback_request: FeedbackRequest,
     feedback_collector: FeedbackCollector = Depends(get_feedback_collector)
 ):
@@ -77,6 +87,25 @@ async def collect_feedback(
         logger.error(f"Error collecting feedback: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to collect feedback: {str(e)}")
 
+@router.post("/collect_batch", response_model=Dict[str, Any])
+def collect_feedback_batch(
+    feedback_requests: List[FeedbackRequest],
+    feedback_collector: FeedbackCollector = Depends(get_feedback_collector)
+):
+    """
+    Collect several feedback entries in one request, stored with a single write
+    """
+    try:
+        feedback_ids = feedback_collector.collect_feedback_batch(
+            [dict(feedback_request) for feedback_request in feedback_requests]
+        )
+        
+        return {"feedback_ids": feedback_ids, "status": "success"}
+        
+    except Exception as e:
+        logger.error(f"Error collecting feedback batch: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to collect feedback: {str(e)}")
+
 @router.get("/prediction/{prediction_id}", response_model=Optional[FeedbackResponse])
 async def get_feedback_by_prediction(
     prediction_id: str,
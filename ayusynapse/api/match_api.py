@@ -4,7 +4,8 @@ FastAPI endpoints for Patient-Trial Matching
 Provides REST API for matching patients to clinical trials
 """
 
-from fastapi import FastAPI, HTTPException, Query
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel, Field
 from typing import Dict, List, Any, Optional
@@ -12,26 +13,102 @@ import logging
 import json
 import sys
 import os
+import uuid
 
-from ..matcher.retrieval import get_candidate_trials, Trial
+from ..matcher.retrieval import get_candidate_trials, load_trial_index, Trial
 from ..matcher.features import FeatureExtractor
 from ..matcher.predicates import Predicate
 from ..matcher.engine import MatchingEngine
 from ..matcher.explain import TrialExplainer
-from ..matcher.rank import TrialRanker, TrialRankingInfo, RankedTrial
-from ..models.feedback.feedback_collector import FeedbackCollector
+from ..matcher.rank import TrialRanker, RankedTrial
+from .feedback_api import get_feedback_collector, router as feedback_router
+from ..settings import API_HOST, API_PORT, API_WORKERS, MAX_CONTENT_LENGTH
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
 logger = logging.getLogger(__name__)
 
+# Static mock payloads for the debugging endpoints, built once at import time
+MOCK_TRIAL_PREDICATES = [
+    {
+        "type": "Patient",
+        "field": "age",
+        "op": ">=",
+        "value": 18,
+        "weight": 2,
+        "inclusion": True
+    },
+    {
+        "type": "Condition",
+        "code": "363418001",
+        "op": "present",
+        "weight": 5,
+        "inclusion": True
+    }
+]
+
+MOCK_TRIAL_METADATA = {
+    "phase": "Phase 2",
+    "intervention": "Drug A",
+    "condition": "Cancer"
+}
+
+MOCK_TRIALS = [
+    {
+        "trial_id": "NCT07062263",
+        "title": "HER2+ Biliary Tract Cancer Study",
+        "status": "Recruiting",
+        "phase": "Phase 2"
+    },
+    {
+        "trial_id": "NCT12345678",
+        "title": "Advanced Cancer Treatment",
+        "status": "Active, not recruiting",
+        "phase": "Phase 3"
+    }
+]
+
+MOCK_STATS = {
+    "total_trials_available": 150,
+    "total_patients_matched": 45,
+    "average_match_score": 78.5,
+    "system_uptime": "24h 30m",
+    "last_updated": "2024-01-01T00:00:00Z"
+}
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Warm the trial data caches at startup so the first /match doesn't pay for them"""
+    try:
+        trial_index = load_trial_index()
+        logger.info(f"Warmed trial index with {len(trial_index)} trials")
+    except Exception as e:
+        logger.warning(f"Could not warm trial index: {e}")
+    yield
+
 # Initialize FastAPI app
 app = FastAPI(
     title="Patient-Trial Matching API",
     description="AI-powered clinical trial matching for patients",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
+# Feedback collection routes under /feedback
+app.include_router(feedback_router)
+
+@app.middleware("http")
+async def reject_oversized_requests(request: Request, call_next):
+    """Reject bodies over MAX_CONTENT_LENGTH before they are read and parsed"""
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > MAX_CONTENT_LENGTH:
+        logger.warning(f"Rejected request to {request.url.path}: body of {content_length} bytes exceeds limit")
+        return JSONResponse(
+            status_code=413,
+            content={"detail": f"Request body exceeds {MAX_CONTENT_LENGTH} bytes"}
+        )
+    return await call_next(request)
+
 # Pydantic models for API
 class PatientBundle(BaseModel):
     """Patient FHIR bundle for matching"""
@@ -72,10 +149,10 @@ class MatchResponse(BaseModel):
 
 # Global instances
 feature_extractor = FeatureExtractor()
-matching_engine = MatchingEngine()
+matching_engine = MatchingEngine(feature_extractor)
 explainer = TrialExplainer()
 ranker = TrialRanker()
-feedback_collector = FeedbackCollector()
+feedback_collector = get_feedback_collector()  # shared with the feedback routes
 
 @app.get("/")
 async def root():
@@ -87,7 +164,7 @@ async def root():
     }
 
 @app.get("/health")
-async def health_check():
+def health_check():
     """Detailed health check"""
     try:
         # Test basic functionality
@@ -119,7 +196,7 @@ async def health_check():
         raise HTTPException(status_code=500, detail=f"Health check failed: {str(e)}")
 
 @app.post("/match", response_model=MatchResponse)
-async def match_patient_to_trials(request: MatchRequest):
+def match_patient_to_trials(request: MatchRequest):
     """
     Match a patient to clinical trials
     
@@ -151,36 +228,7 @@ async def match_patient_to_trials(request: MatchRequest):
             )
         
         # Step 3: Evaluate each trial (simplified for demo)
-        results = []
-        for trial in candidate_trials:
-            try:
-                # For demo purposes, create a simple result based on trial score
-                # In a real implementation, this would use the full predicate evaluation
-                from matcher.engine import TrialMatchResult
-                
-                # Create a mock result based on the trial's score
-                # Scale the trial score to a reasonable range (trial scores are typically 1-10)
-                scaled_score = min(100.0, trial.score * 15)  # Scale more generously
-                mock_result = TrialMatchResult(
-                    eligible=trial.score > 3,  # Lower threshold for demo
-                    score=scaled_score,
-                    matched_inclusions=[],
-                    unmatched_inclusions=[],
-                    missing_inclusions=[],
-                    exclusions_triggered=[],
-                    total_inclusions=1,  # Mock value
-                    matched_count=1 if trial.score > 3 else 0,  # Mock value
-                    coverage_percentage=100.0 if trial.score > 3 else 0.0,  # Mock value
-                    reasons=trial.match_reasons,  # Use actual match reasons
-                    suggested_data=[]
-                )
-                
-                results.append((trial.trial_id, mock_result))
-                logger.debug(f"Evaluated trial {trial.trial_id}: score={mock_result.score:.1f}, eligible={mock_result.eligible}")
-                
-            except Exception as e:
-                logger.warning(f"Failed to evaluate trial {trial.trial_id}: {e}")
-                continue
+        results = matching_engine.score_candidate_trials(candidate_trials)
         
         if not results:
             return MatchResponse(
@@ -192,20 +240,15 @@ async def match_patient_to_trials(request: MatchRequest):
             )
         
         # Step 4: Create ranking info (simplified - in real implementation, this would come from trial metadata)
-        ranking_info = {}
-        for trial_id, result in results:
-            ranking_info[trial_id] = TrialRankingInfo(
-                trial_id=trial_id,
-                recruiting_status="Recruiting",  # Default - would come from trial metadata
-                must_have_biomarkers=[],  # Would be extracted from trial criteria
-                has_all_must_have=False,  # Would be determined by analysis
-                zero_exclusions=len(result.exclusions_triggered) == 0
-            )
+        ranking_info = ranker.build_ranking_info(results)
         
         # Step 5: Rank trials
         ranked_trials = ranker.rank_trials(results, ranking_info)
         ranked_trials = ranked_trials[:request.top_k]  # Limit to top_k
         
+        # Generate prediction ID for feedback tracking
+        prediction_id = str(uuid.uuid4())
+        
         # Step 6: Generate explanations if requested
         top_trials_response = []
         for ranked_trial in ranked_trials:
@@ -223,7 +266,9 @@ async def match_patient_to_trials(request: MatchRequest):
                     missing_data=explanation.missing_data,
                     recommendations=explanation.recommendations,
                     recruiting_status=ranked_trial.ranking_info.recruiting_status,
-                    start_date=ranked_trial.ranking_info.start_date.isoformat() if ranked_trial.ranking_info.start_date else None
+                    start_date=ranked_trial.ranking_info.start_date.isoformat() if ranked_trial.ranking_info.start_date else None,
+                    prediction_id=prediction_id,
+                    confidence_score=ranked_trial.final_score / 100.0  # Normalize to 0-1
                 )
             else:
                 trial_response = TrialMatchResponse(
@@ -235,7 +280,9 @@ async def match_patient_to_trials(request: MatchRequest):
                     matched_criteria=[],
                     blockers=[],
                     missing_data=[],
-                    recommendations=[]
+                    recommendations=[],
+                    prediction_id=prediction_id,
+                    confidence_score=ranked_trial.final_score / 100.0  # Normalize to 0-1
                 )
             
             top_trials_response.append(trial_response)
@@ -248,15 +295,6 @@ async def match_patient_to_trials(request: MatchRequest):
         
         logger.info(f"Completed matching: {len(ranked_trials)} trials ranked, {summary['eligible_trials']} eligible")
         
-        # Generate prediction ID for feedback tracking
-        import uuid
-        prediction_id = str(uuid.uuid4())
-        
-        # Add prediction ID to each trial response for feedback collection
-        for trial_response in top_trials_response:
-            trial_response.prediction_id = prediction_id
-            trial_response.confidence_score = trial_response.score / 100.0  # Normalize to 0-1
-        
         return MatchResponse(
             patient_id=request.patient.patient_id or "unknown",
             total_trials_evaluated=len(results),
@@ -285,28 +323,8 @@ async def get_trial_info(trial_id: str):
             "title": f"Clinical Trial {trial_id}",
             "status": "Recruiting",
             "start_date": "2023-06-15",
-            "predicates": [
-                {
-                    "type": "Patient",
-                    "field": "age",
-                    "op": ">=",
-                    "value": 18,
-                    "weight": 2,
-                    "inclusion": True
-                },
-                {
-                    "type": "Condition",
-                    "code": "363418001",
-                    "op": "present",
-                    "weight": 5,
-                    "inclusion": True
-                }
-            ],
-            "metadata": {
-                "phase": "Phase 2",
-                "intervention": "Drug A",
-                "condition": "Cancer"
-            }
+            "predicates": MOCK_TRIAL_PREDICATES,
+            "metadata": MOCK_TRIAL_METADATA
         }
     except Exception as e:
         logger.error(f"Error fetching trial {trial_id}: {e}")
@@ -323,20 +341,7 @@ async def list_trials(
     try:
         # In a real implementation, this would query a trial database
         # For now, return mock data
-        trials = [
-            {
-                "trial_id": "NCT07062263",
-                "title": "HER2+ Biliary Tract Cancer Study",
-                "status": "Recruiting",
-                "phase": "Phase 2"
-            },
-            {
-                "trial_id": "NCT12345678",
-                "title": "Advanced Cancer Treatment",
-                "status": "Active, not recruiting",
-                "phase": "Phase 3"
-            }
-        ]
+        trials = MOCK_TRIALS
         
         if status:
             trials = [t for t in trials if t["status"].lower() == status.lower()]
@@ -356,17 +361,12 @@ async def get_matching_stats():
     Get matching system statistics
     """
     try:
-        return {
-            "total_trials_available": 150,  # Mock data
-            "total_patients_matched": 45,
-            "average_match_score": 78.5,
-            "system_uptime": "24h 30m",
-            "last_updated": "2024-01-01T00:00:00Z"
-        }
+        return MOCK_STATS
     except Exception as e:
         logger.error(f"Error getting stats: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to get stats: {str(e)}")
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # Pass the app as an import string so uvicorn can start worker processes
+    uvicorn.run("ayusynapse.api.match_api:app", host=API_HOST, port=API_PORT, workers=API_WORKERS)
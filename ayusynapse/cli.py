@@ -18,7 +18,7 @@ from .matcher.features import FeatureExtractor
 from .matcher.predicates import Predicate
 from .matcher.engine import MatchingEngine
 from .matcher.explain import TrialExplainer
-from .matcher.rank import TrialRanker, TrialRankingInfo, RankedTrial
+from .matcher.rank import TrialRanker, RankedTrial
 from .matcher.coverage_report import CoverageReportGenerator
 
 # Configure logging
@@ -34,7 +34,7 @@ class PatientTrialMatcher:
     
     def __init__(self):
         self.feature_extractor = FeatureExtractor()
-        self.matching_engine = MatchingEngine()
+        self.matching_engine = MatchingEngine(self.feature_extractor)
         self.explainer = TrialExplainer()
         self.ranker = TrialRanker()
         self.coverage_generator = CoverageReportGenerator()
@@ -180,36 +180,7 @@ class PatientTrialMatcher:
             }
         
         # Step 3: Evaluate each trial (simplified for demo)
-        results = []
-        for trial in candidate_trials:
-            try:
-                # For demo purposes, create a simple result based on trial score
-                # In a real implementation, this would use the full predicate evaluation
-                from matcher.engine import TrialMatchResult
-                
-                # Create a mock result based on the trial's score
-                # Scale the trial score to a reasonable range (trial scores are typically 1-10)
-                scaled_score = min(100.0, trial.score * 15)  # Scale more generously
-                mock_result = TrialMatchResult(
-                    eligible=trial.score > 3,  # Lower threshold for demo
-                    score=scaled_score,
-                    matched_inclusions=[],
-                    unmatched_inclusions=[],
-                    missing_inclusions=[],
-                    exclusions_triggered=[],
-                    total_inclusions=1,  # Mock value
-                    matched_count=1 if trial.score > 3 else 0,  # Mock value
-                    coverage_percentage=100.0 if trial.score > 3 else 0.0,  # Mock value
-                    reasons=trial.match_reasons,  # Use actual match reasons
-                    suggested_data=[]
-                )
-                
-                results.append((trial.trial_id, mock_result))
-                logger.info(f"Trial {trial.trial_id}: original_score={trial.score}, scaled_score={mock_result.score:.1f}, eligible={mock_result.eligible}")
-                
-            except Exception as e:
-                logger.warning(f"Failed to evaluate trial {trial.trial_id}: {e}")
-                continue
+        results = self.matching_engine.score_candidate_trials(candidate_trials)
         
         if not results:
             return {
@@ -221,15 +192,7 @@ class PatientTrialMatcher:
             }
         
         # Step 4: Create ranking info
-        ranking_info = {}
-        for trial_id, result in results:
-            ranking_info[trial_id] = TrialRankingInfo(
-                trial_id=trial_id,
-                recruiting_status="Recruiting",  # Default
-                must_have_biomarkers=[],
-                has_all_must_have=False,
-                zero_exclusions=len(result.exclusions_triggered) == 0
-            )
+        ranking_info = self.ranker.build_ranking_info(results)
         
         # Step 5: Rank trials
         self.ranker.min_score = min_score
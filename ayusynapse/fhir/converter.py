@@ -5,12 +5,15 @@ FHIR Converter - Single file to convert extracted data to standard HL7 FHIR form
 
 import json
 import re
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from datetime import datetime, timedelta
 import uuid
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from .validator import FHIRValidator
 from .fhir_storage import FHIRStorage
+from ..settings import MAX_WORKERS
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -24,9 +27,23 @@ except Exception as e:
     logger.warning(f"Could not load EMR mappings: {e}")
     emr_mappings = {}
 
+# Patterns for pulling the coding out of an EMR "fhir_mappings" string
+CODE_SYSTEM_PATTERN = re.compile(r"code_system='([^']+)'")
+CODE_VALUE_PATTERN = re.compile(r"code_value='([^']+)'")
+
 class FHIRConverter:
     """Convert extracted clinical trial data to HL7 FHIR format"""
     
+    # UCUM codes for time units
+    UCUM_UNIT_CODES = {
+        'weeks': 'wk',
+        'months': 'mo',
+        'years': 'a',
+        'days': 'd',
+        'hours': 'h',
+        'minutes': 'min'
+    }
+    
     def __init__(self):
         self.coding_systems = {
             'SNOMED_CT': 'http://snomed.info/sct',
@@ -85,17 +102,18 @@ class FHIRConverter:
             Dict with coding information or fallback to text
         """
         # Search through all categories in EMR mappings
+        entity_key = entity_text.lower()
         for category, subcategories in emr_mappings.items():
             for subcategory, terms in subcategories.items():
-                if entity_text.lower() in terms:
-                    term_data = terms[entity_text.lower()]
+                if entity_key in terms:
+                    term_data = terms[entity_key]
                     if term_data.get('fhir_mappings'):
                         # Extract coding from FHIR mapping string
                         fhir_mapping = term_data['fhir_mappings'][0]
                         # Parse the FHIR mapping string to extract code_system and code_value
                         if 'code_system=' in fhir_mapping and 'code_value=' in fhir_mapping:
-                            code_system_match = re.search(r"code_system='([^']+)'", fhir_mapping)
-                            code_value_match = re.search(r"code_value='([^']+)'", fhir_mapping)
+                            code_system_match = CODE_SYSTEM_PATTERN.search(fhir_mapping)
+                            code_value_match = CODE_VALUE_PATTERN.search(fhir_mapping)
                             
                             if code_system_match and code_value_match:
                                 return {
@@ -156,8 +174,9 @@ class FHIRConverter:
         
         return patient, patient_id
     
-    def create_condition_resource(self, entity: Dict, resource_id: int, patient_id: str) -> Dict:
-        """Create Condition resource"""
+    def create_condition_resource(self, entity: Dict, resource_id: int, patient_id: str,
+                                  timestamp: Optional[str] = None) -> Dict:
+        """Create Condition resource (timestamp defaults to now)"""
         return {
             "resourceType": "Condition",
             "id": f"condition-{resource_id}",
@@ -203,11 +222,13 @@ class FHIRConverter:
                 "text": entity['text']
             },
             "onsetDateTime": "2024-01-01",
-            "recordedDate": datetime.now().isoformat()
+            "recordedDate": timestamp or datetime.now().isoformat()
         }
     
-    def create_observation_resource(self, entity: Dict, resource_id: int, patient_id: str) -> Dict:
-        """Create Observation resource"""
+    def create_observation_resource(self, entity: Dict, resource_id: int, patient_id: str,
+                                    timestamp: Optional[str] = None) -> Dict:
+        """Create Observation resource (timestamp defaults to now)"""
+        timestamp = timestamp or datetime.now().isoformat()
         observation = {
             "resourceType": "Observation",
             "id": f"observation-{resource_id}",
@@ -235,8 +256,8 @@ class FHIRConverter:
             "subject": {
                 "reference": f"Patient/{patient_id}"
             },
-            "effectiveDateTime": datetime.now().isoformat(),
-            "issued": datetime.now().isoformat(),
+            "effectiveDateTime": timestamp,
+            "issued": timestamp,
             "performer": [
                 {
                     "reference": "Practitioner/example",
@@ -304,18 +325,11 @@ class FHIRConverter:
     
     def _get_ucum_code(self, unit: str) -> str:
         """Get UCUM code for units"""
-        ucum_mapping = {
-            'weeks': 'wk',
-            'months': 'mo',
-            'years': 'a',
-            'days': 'd',
-            'hours': 'h',
-            'minutes': 'min'
-        }
-        return ucum_mapping.get(unit.lower(), unit)
+        return self.UCUM_UNIT_CODES.get(unit.lower(), unit)
     
-    def convert_trial_to_fhir(self, trial: Dict) -> Dict:
-        """Convert a single trial to FHIR Bundle"""
+    def convert_trial_to_fhir(self, trial: Dict, timestamp: Optional[str] = None) -> Dict:
+        """Convert a single trial to FHIR Bundle, stamping every resource with one timestamp"""
+        timestamp = timestamp or datetime.now().isoformat()
         trial_id = trial['trial_id']
         entities = trial.get('all_entities', [])
         
@@ -331,9 +345,9 @@ class FHIRConverter:
                 continue  # Skip patient entities as we already created the patient resource
             
             if entity['resource_type'] == 'Condition':
-                fhir_resource = self.create_condition_resource(entity, resource_counter, patient_id)
+                fhir_resource = self.create_condition_resource(entity, resource_counter, patient_id, timestamp)
             elif entity['resource_type'] == 'Observation':
-                fhir_resource = self.create_observation_resource(entity, resource_counter, patient_id)
+                fhir_resource = self.create_observation_resource(entity, resource_counter, patient_id, timestamp)
             else:
                 continue
             
@@ -345,7 +359,7 @@ class FHIRConverter:
             "resourceType": "Bundle",
             "id": f"trial-{trial_id}-bundle",
             "type": "collection",
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": timestamp,
             "entry": []
         }
         
@@ -363,9 +377,10 @@ class FHIRConverter:
         
         all_bundles = []
         total_resources = 0
+        conversion_timestamp = datetime.now().isoformat()
         
         for trial in extracted_data.get('trials', []):
-            bundle = self.convert_trial_to_fhir(trial)
+            bundle = self.convert_trial_to_fhir(trial, conversion_timestamp)
             all_bundles.append({
                 'trial_id': trial['trial_id'],
                 'nct_id': trial.get('nct_id', ''),
@@ -380,7 +395,7 @@ class FHIRConverter:
             "resourceType": "Bundle",
             "id": "clinical-trials-master-bundle",
             "type": "collection",
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": conversion_timestamp,
             "entry": []
         }
         
@@ -396,7 +411,7 @@ class FHIRConverter:
             'summary': {
                 'total_trials': len(all_bundles),
                 'total_resources': total_resources,
-                'conversion_timestamp': datetime.now().isoformat()
+                'conversion_timestamp': conversion_timestamp
             }
         }
         
@@ -447,13 +462,27 @@ class FHIRConverter:
             if 'individual_bundles' in fhir_data:
                 logger.info(f"📦 Storing {len(fhir_data['individual_bundles'])} individual trial bundles...")
                 
-                stored_count = 0
+                pending = []
                 for i, trial_bundle in enumerate(fhir_data['individual_bundles']):
                     if 'fhir_bundle' in trial_bundle:
                         trial_id = trial_bundle.get('trial_id', f'trial_{i+1}')
                         logger.info(f"📤 Storing trial {i+1}: {trial_id}")
-                        
-                        result = storage.store_bundle(trial_bundle['fhir_bundle'])
+                        pending.append((trial_id, trial_bundle['fhir_bundle']))
+                
+                # Uploads are network-bound, so overlap them across worker threads,
+                # each posting through its own session
+                worker_state = threading.local()
+                
+                def store_bundle(bundle: Dict) -> Dict:
+                    if not hasattr(worker_state, 'storage'):
+                        worker_state.storage = storage.for_worker()
+                    return worker_state.storage.store_bundle(bundle)
+                
+                with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+                    results = executor.map(store_bundle, [bundle for _, bundle in pending])
+                    
+                    stored_count = 0
+                    for (trial_id, _), result in zip(pending, results):
                         if result['success']:
                             bundle_id = result['resource_id']
                             logger.info(f"✅ Successfully stored Bundle with ID: {bundle_id}")
@@ -12,6 +12,56 @@ import logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+TRIAL_HEADER_PATTERN = re.compile(r'(\d+)\.\s*(NCT\d+)\s*[–-]\s*(.+)')
+
+AGE_PATTERNS = [
+    re.compile(r'(\d+)\s*(?:years?\s*old?|y\.?o\.?)', re.IGNORECASE),
+    re.compile(r'age\s*(?:of\s*)?(\d+)\s*(?:years?|y\.?)', re.IGNORECASE),
+    re.compile(r'(\d+)\s*years?\s*and\s*older', re.IGNORECASE),
+    re.compile(r'(\d+)\s*-\s*(\d+)\s*years?', re.IGNORECASE)
+]
+
+GENDER_PATTERN = re.compile(r'\b(male|female|all)\b', re.IGNORECASE)
+
+DIAGNOSIS_PATTERNS = [
+    re.compile(r'\b(histologically\s+confirmed\s+)?(adenocarcinoma|carcinoma|cancer)\b', re.IGNORECASE),
+    re.compile(r'\b(breast|lung|colorectal|prostate|pancreatic|ovarian|biliary\s+tract|gastric|gastroesophageal)\s+cancer\b', re.IGNORECASE),
+    re.compile(r'\b(aml|all|cll|mds|multiple\s+myeloma|myelodysplastic\s+syndrome)\b', re.IGNORECASE),
+    re.compile(r'\b(metastatic|advanced|localized|unresectable)\s+(disease|tumor|cancer)\b', re.IGNORECASE),
+    re.compile(r'\b(relapsed|refractory)\s+(disease|tumor|cancer)\b', re.IGNORECASE),
+    re.compile(r'\b(solid\s+tumors?)\b', re.IGNORECASE)
+]
+
+# (pattern, group holding the ECOG score)
+ECOG_PATTERNS = [
+    (re.compile(r'\b(ecog|eastern\s+cooperative\s+oncology\s+group)\s*(?:performance\s+status\s*)?(\d+)\b', re.IGNORECASE), 2),
+    (re.compile(r'\bperformance\s+status\s*(\d+)\b', re.IGNORECASE), 1),
+    (re.compile(r'\becog\s*(\d+)\s*-\s*(\d+)\b', re.IGNORECASE), 1)
+]
+
+BIOMARKER_PATTERNS = [
+    re.compile(r'\b(her2|egfr|alk|ros1|braf|kras|nras|p53|ki67)\s*(positive|negative)?\b', re.IGNORECASE),
+    re.compile(r'\b(estrogen\s+receptor|progesterone\s+receptor)\s*(positive|negative)?\b', re.IGNORECASE),
+    re.compile(r'\b(er|pr)\s*(positive|negative)\b', re.IGNORECASE),
+    re.compile(r'\b(her2|egfr|alk)\s*positive\s+status\b', re.IGNORECASE)
+]
+
+MEASURABLE_PATTERNS = [
+    re.compile(r'\b(at\s+least\s+one\s+)?measurable\s+(lesion|disease|tumor)\b', re.IGNORECASE),
+    re.compile(r'\b(recist\s+v?1\.1)\b', re.IGNORECASE),
+    re.compile(r'\b(measurable\s+disease)\b', re.IGNORECASE)
+]
+
+LIFE_EXPECTANCY_PATTERN = re.compile(r'\b(life\s+expectancy)\s*≥?\s*(\d+)\s*(weeks?|months?|years?)\b', re.IGNORECASE)
+
+EXCLUSION_PATTERNS = [
+    re.compile(r'\b(prior|previous)\s+(systemic\s+therapy|treatment)\s+for\s+(advanced|metastatic|unresectable)\s+disease\b', re.IGNORECASE),
+    re.compile(r'\b(cns\s+metastases|brain\s+metastases)\b', re.IGNORECASE),
+    re.compile(r'\b(pregnant|breastfeeding|pregnancy)\b', re.IGNORECASE),
+    re.compile(r'\b(significant\s+cardiovascular\s+disease|uncontrolled\s+infection)\b', re.IGNORECASE),
+    re.compile(r'\b(active\s+uncontrolled\s+infections?)\b', re.IGNORECASE)
+]
+
 class FHIRExtractor:
     """Extract clinical trial criteria from dataset"""
     
@@ -52,7 +102,7 @@ class FHIRExtractor:
         
         for paragraph in raw_content.get('paragraphs', []):
             # Check if this is a new trial (starts with number and NCT)
-            trial_match = re.match(r'(\d+)\.\s*(NCT\d+)\s*[–-]\s*(.+)', paragraph)
+            trial_match = TRIAL_HEADER_PATTERN.match(paragraph)
             
             if trial_match:
                 # Save previous trial if exists
@@ -108,15 +158,8 @@ class FHIRExtractor:
         entities = []
         
         # Age extraction
-        age_patterns = [
-            r'(\d+)\s*(?:years?\s*old?|y\.?o\.?)',
-            r'age\s*(?:of\s*)?(\d+)\s*(?:years?|y\.?)',
-            r'(\d+)\s*years?\s*and\s*older',
-            r'(\d+)\s*-\s*(\d+)\s*years?'
-        ]
-        
-        for pattern in age_patterns:
-            age_match = re.search(pattern, criteria_text, re.IGNORECASE)
+        for pattern in AGE_PATTERNS:
+            age_match = pattern.search(criteria_text)
             if age_match:
                 entities.append({
                     'text': age_match.group(0),
@@ -127,7 +170,7 @@ class FHIRExtractor:
                 break
         
         # Gender extraction
-        gender_match = re.search(r'\b(male|female|all)\b', criteria_text, re.IGNORECASE)
+        gender_match = GENDER_PATTERN.search(criteria_text)
         if gender_match:
             gender_value = gender_match.group(1).lower()
             if gender_value == 'all':
@@ -140,17 +183,8 @@ class FHIRExtractor:
             })
         
         # Diagnosis extraction
-        diagnosis_patterns = [
-            r'\b(histologically\s+confirmed\s+)?(adenocarcinoma|carcinoma|cancer)\b',
-            r'\b(breast|lung|colorectal|prostate|pancreatic|ovarian|biliary\s+tract|gastric|gastroesophageal)\s+cancer\b',
-            r'\b(aml|all|cll|mds|multiple\s+myeloma|myelodysplastic\s+syndrome)\b',
-            r'\b(metastatic|advanced|localized|unresectable)\s+(disease|tumor|cancer)\b',
-            r'\b(relapsed|refractory)\s+(disease|tumor|cancer)\b',
-            r'\b(solid\s+tumors?)\b'
-        ]
-        
-        for pattern in diagnosis_patterns:
-            for match in re.finditer(pattern, criteria_text, re.IGNORECASE):
+        for pattern in DIAGNOSIS_PATTERNS:
+            for match in pattern.finditer(criteria_text):
                 entities.append({
                     'text': match.group(0),
                     'entity_type': 'DIAGNOSIS',
@@ -159,20 +193,10 @@ class FHIRExtractor:
                 })
         
         # ECOG extraction
-        ecog_patterns = [
-            r'\b(ecog|eastern\s+cooperative\s+oncology\s+group)\s*(?:performance\s+status\s*)?(\d+)\b',
-            r'\bperformance\s+status\s*(\d+)\b',
-            r'\becog\s*(\d+)\s*-\s*(\d+)\b'
-        ]
-        
-        for pattern in ecog_patterns:
-            ecog_match = re.search(pattern, criteria_text, re.IGNORECASE)
+        for pattern, score_group in ECOG_PATTERNS:
+            ecog_match = pattern.search(criteria_text)
             if ecog_match:
-                # Get the numeric group (group 2 for first pattern, group 1 for others)
-                if pattern == r'\b(ecog|eastern\s+cooperative\s+oncology\s+group)\s*(?:performance\s+status\s*)?(\d+)\b':
-                    ecog_score = int(ecog_match.group(2))
-                else:
-                    ecog_score = int(ecog_match.group(1))
+                ecog_score = int(ecog_match.group(score_group))
                 entities.append({
                     'text': ecog_match.group(0),
                     'entity_type': 'ECOG',
@@ -182,15 +206,8 @@ class FHIRExtractor:
                 break
         
         # Biomarker extraction
-        biomarker_patterns = [
-            r'\b(her2|egfr|alk|ros1|braf|kras|nras|p53|ki67)\s*(positive|negative)?\b',
-            r'\b(estrogen\s+receptor|progesterone\s+receptor)\s*(positive|negative)?\b',
-            r'\b(er|pr)\s*(positive|negative)\b',
-            r'\b(her2|egfr|alk)\s*positive\s+status\b'
-        ]
-        
-        for pattern in biomarker_patterns:
-            for match in re.finditer(pattern, criteria_text, re.IGNORECASE):
+        for pattern in BIOMARKER_PATTERNS:
+            for match in pattern.finditer(criteria_text):
                 entities.append({
                     'text': match.group(0),
                     'entity_type': 'BIOMARKER',
@@ -199,14 +216,8 @@ class FHIRExtractor:
                 })
         
         # Measurable disease extraction
-        measurable_patterns = [
-            r'\b(at\s+least\s+one\s+)?measurable\s+(lesion|disease|tumor)\b',
-            r'\b(recist\s+v?1\.1)\b',
-            r'\b(measurable\s+disease)\b'
-        ]
-        
-        for pattern in measurable_patterns:
-            measurable_match = re.search(pattern, criteria_text, re.IGNORECASE)
+        for pattern in MEASURABLE_PATTERNS:
+            measurable_match = pattern.search(criteria_text)
             if measurable_match:
                 entities.append({
                     'text': measurable_match.group(0),
@@ -217,7 +228,7 @@ class FHIRExtractor:
                 break
         
         # Life expectancy extraction
-        life_expectancy_match = re.search(r'\b(life\s+expectancy)\s*≥?\s*(\d+)\s*(weeks?|months?|years?)\b', criteria_text, re.IGNORECASE)
+        life_expectancy_match = LIFE_EXPECTANCY_PATTERN.search(criteria_text)
         if life_expectancy_match:
             entities.append({
                 'text': life_expectancy_match.group(0),
@@ -230,16 +241,8 @@ class FHIRExtractor:
             })
         
         # Exclusion criteria extraction
-        exclusion_patterns = [
-            r'\b(prior|previous)\s+(systemic\s+therapy|treatment)\s+for\s+(advanced|metastatic|unresectable)\s+disease\b',
-            r'\b(cns\s+metastases|brain\s+metastases)\b',
-            r'\b(pregnant|breastfeeding|pregnancy)\b',
-            r'\b(significant\s+cardiovascular\s+disease|uncontrolled\s+infection)\b',
-            r'\b(active\s+uncontrolled\s+infections?)\b'
-        ]
-        
-        for pattern in exclusion_patterns:
-            for match in re.finditer(pattern, criteria_text, re.IGNORECASE):
+        for pattern in EXCLUSION_PATTERNS:
+            for match in pattern.finditer(criteria_text):
                 entities.append({
                     'text': match.group(0),
                     'entity_type': 'EXCLUSION',
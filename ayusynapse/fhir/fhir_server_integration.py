@@ -221,6 +221,56 @@ class FHIRServerIntegration:
             logger.error(f"❌ Error uploading bundle: {e}")
             return None
     
+    @staticmethod
+    def build_transaction_bundle(fhir_bundle: Dict) -> Dict:
+        """
+        Convert a collection bundle into a transaction bundle that creates all its resources
+        
+        Patient resources get a urn:uuid fullUrl and "Patient/<id>" subject references are
+        rewritten to it, so the server links the new resources in a single request.
+        
+        Args:
+            fhir_bundle: Collection bundle as produced by the FHIR converter
+            
+        Returns:
+            Dict: FHIR transaction Bundle
+        """
+        resources = [entry['resource'] for entry in fhir_bundle.get('entry', []) if 'resource' in entry]
+        patient_urls = {
+            resource['id']: f"urn:uuid:{resource['id']}"
+            for resource in resources
+            if resource.get('resourceType') == 'Patient' and 'id' in resource
+        }
+        
+        entries = []
+        for resource in resources:
+            resource_type = resource.get('resourceType')
+            if not resource_type:
+                continue
+            
+            resource_copy = {key: value for key, value in resource.items() if key != 'id'}
+            
+            # Point subject references at the Patient created in this transaction
+            reference = resource_copy.get('subject', {}).get('reference', '')
+            if reference.startswith('Patient/'):
+                old_patient_id = reference.split('/')[1]
+                if old_patient_id in patient_urls:
+                    resource_copy['subject'] = {**resource_copy['subject'], 'reference': patient_urls[old_patient_id]}
+            
+            entry = {
+                'resource': resource_copy,
+                'request': {'method': 'POST', 'url': resource_type}
+            }
+            if resource_type == 'Patient' and resource.get('id') in patient_urls:
+                entry['fullUrl'] = patient_urls[resource['id']]
+            entries.append(entry)
+        
+        return {
+            'resourceType': 'Bundle',
+            'type': 'transaction',
+            'entry': entries
+        }
+    
     def get_server_capabilities(self) -> Optional[Dict]:
         """
         Get server capabilities (Conformance statement)
@@ -376,61 +426,18 @@ def upload_clinical_trials_bundle():
                 if fhir_bundle:
                     print(f"Uploading trial {i+1}: {trial_id}")
                     
-                    # Extract individual resources from the bundle
-                    resources = []
-                    for entry in fhir_bundle.get('entry', []):
-                        if 'resource' in entry:
-                            resources.append(entry['resource'])
-                    
-                    # First, upload Patient resources and track their IDs
-                    patient_id_mapping = {}
-                    other_resources = []
-                    
-                    for resource in resources:
-                        resource_type = resource.get('resourceType')
-                        if resource_type == 'Patient':
-                            # Upload Patient first
-                            resource_copy = resource.copy()
-                            if 'id' in resource_copy:
-                                old_id = resource_copy['id']
-                                del resource_copy['id']
-                                
-                                created_patient = fhir_server.create_resource('Patient', resource_copy)
-                                if created_patient:
-                                    new_id = created_patient.get('id')
-                                    patient_id_mapping[old_id] = new_id
-                                    print(f"  ✅ Created Patient with ID: {new_id}")
-                                else:
-                                    print(f"  ❌ Failed to create Patient")
-                        else:
-                            other_resources.append(resource)
+                    # Send the whole trial as one transaction; the server assigns
+                    # ids and resolves the urn:uuid Patient references itself
+                    transaction = fhir_server.build_transaction_bundle(fhir_bundle)
+                    result = fhir_server.upload_bundle(transaction)
                     
-                    # Now upload other resources with updated Patient references
-                    for resource in other_resources:
-                        resource_type = resource.get('resourceType')
-                        if resource_type:
-                            try:
-                                # Update Patient references
-                                resource_copy = resource.copy()
-                                if 'id' in resource_copy:
-                                    del resource_copy['id']
-                                
-                                # Update subject reference if it exists
-                                if 'subject' in resource_copy and 'reference' in resource_copy['subject']:
-                                    old_reference = resource_copy['subject']['reference']
-                                    if old_reference.startswith('Patient/'):
-                                        old_patient_id = old_reference.split('/')[1]
-                                        if old_patient_id in patient_id_mapping:
-                                            new_patient_id = patient_id_mapping[old_patient_id]
-                                            resource_copy['subject']['reference'] = f'Patient/{new_patient_id}'
-                                
-                                created_resource = fhir_server.create_resource(resource_type, resource_copy)
-                                if created_resource:
-                                    print(f"  ✅ Created {resource_type} with ID: {created_resource.get('id')}")
-                                else:
-                                    print(f"  ❌ Failed to create {resource_type}")
-                            except Exception as e:
-                                print(f"  ❌ Error creating {resource_type}: {e}")
+                    if result:
+                        for entry in result.get('entry', []):
+                            location = entry.get('response', {}).get('location', '')
+                            print(f"  ✅ Created {location}")
+                    else:
+                        print(f"  ❌ Failed to upload trial {trial_id}")
+                        continue
                     
                     uploaded_count += 1
                     print(f"  ✅ Completed trial {trial_id}")
@@ -3,6 +3,7 @@
 FHIR Storage Module - Dedicated module for storing FHIR bundles to HAPI FHIR server
 """
 
+import copy
 import json
 import requests
 import logging
@@ -27,6 +28,18 @@ class FHIRStorage:
         # Test connection on initialization
         self._test_connection()
     
+    def for_worker(self) -> 'FHIRStorage':
+        """
+        Copy of this storage with its own HTTP session, for use from a worker thread
+        
+        requests does not document Session as thread-safe, so concurrent
+        uploads should not share one. The copy skips the connection test.
+        """
+        worker = copy.copy(self)
+        worker.session = requests.Session()
+        worker.session.headers.update(self.session.headers)
+        return worker
+    
     def _test_connection(self) -> bool:
         """Test connection to FHIR server"""
         try:
@@ -4,7 +4,7 @@ Matching Engine for Patient-Trial Matching
 Implements inclusion/exclusion semantics and scoring logic
 """
 
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, List, Any, Optional, Tuple, TYPE_CHECKING
 import logging
 
 from .predicates import Predicate, PredicateEvaluator
@@ -12,6 +12,10 @@ from .features import FeatureExtractor
 from .coverage_report import CoverageReportGenerator
 from .types import MatchResult, TrialMatchResult
 
+if TYPE_CHECKING:
+    # Annotation only; importing retrieval at runtime pulls in requests and its logging setup
+    from .retrieval import Trial
+
 logger = logging.getLogger(__name__)
 
 
@@ -174,10 +178,9 @@ class MatchingEngine:
             return 100.0  # No criteria to match
         
         # Calculate weights
-        W = sum(r.predicate.weight for r in matched_inclusions + unmatched_inclusions + 
-                [MatchResult(predicate=p, matched=False, evidence="missing") for p in missing_inclusions])
         M = sum(r.predicate.weight for r in matched_inclusions)
         U = sum(p.weight for p in missing_inclusions)
+        W = M + sum(r.predicate.weight for r in unmatched_inclusions) + U
         
         # Log components for explainability
         logger.info(f"Scoring components: M={M}, W={W}, U={U}, alpha={alpha}")
@@ -499,6 +502,48 @@ class MatchingEngine:
         results.sort(key=lambda x: (x[1].eligible, x[1].score), reverse=True)
         
         return results
+    
+    def score_candidate_trials(self, candidate_trials: List['Trial']) -> List[Tuple[str, TrialMatchResult]]:
+        """
+        Turn retrieval candidates into match results from their retrieval score
+        
+        Simplified evaluation shared by the API and CLI until trial predicates
+        are available for full predicate evaluation.
+        
+        Args:
+            candidate_trials: Candidates from get_candidate_trials
+            
+        Returns:
+            List of (trial_id, TrialMatchResult) tuples in candidate order
+        """
+        results = []
+        
+        for trial in candidate_trials:
+            try:
+                # Scale the trial score to a reasonable range (trial scores are typically 1-10)
+                scaled_score = min(100.0, trial.score * 15)  # Scale more generously
+                result = TrialMatchResult(
+                    eligible=trial.score > 3,  # Lower threshold for demo
+                    score=scaled_score,
+                    matched_inclusions=[],
+                    unmatched_inclusions=[],
+                    missing_inclusions=[],
+                    exclusions_triggered=[],
+                    total_inclusions=1,  # Mock value
+                    matched_count=1 if trial.score > 3 else 0,  # Mock value
+                    coverage_percentage=100.0 if trial.score > 3 else 0.0,  # Mock value
+                    reasons=trial.match_reasons,  # Use actual match reasons
+                    suggested_data=[]
+                )
+                
+                results.append((trial.trial_id, result))
+                logger.debug(f"Trial {trial.trial_id}: original_score={trial.score}, scaled_score={result.score:.1f}, eligible={result.eligible}")
+                
+            except Exception as e:
+                logger.warning(f"Failed to evaluate trial {trial.trial_id}: {e}")
+                continue
+        
+        return results
 
 def create_sample_trials() -> List[Tuple[str, List[Predicate]]]:
     """Create sample trials for testing"""
@@ -13,6 +13,122 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+SENTENCE_SPLIT_PATTERN = re.compile(r'[.!?]+')
+
+TEXT_AGE_PATTERNS = [
+    re.compile(r'(\d+)\s*(?:years?|yrs?|y)\s*old', re.IGNORECASE),
+    re.compile(r'age\s*(?:of\s*)?(\d+)', re.IGNORECASE),
+    re.compile(r'(\d+)\s*(?:years?|yrs?|y)', re.IGNORECASE)
+]
+
+TEXT_LAB_PATTERNS = [
+    re.compile(r'(\d+(?:\.\d+)?)\s*(mg/dL|mmol/L|g/dL|ng/mL|pg/mL|U/L|mIU/L)', re.IGNORECASE),
+    re.compile(r'(\d+(?:\.\d+)?)\s*(mmHg|mm Hg|°C|°F)', re.IGNORECASE)
+]
+
+# Canonical spellings for enum-like values
+ENUM_NORMALIZATION = {
+    "positive": "positive", "pos": "positive", "+": "positive",
+    "negative": "negative", "neg": "negative", "-": "negative",
+    "yes": "true", "true": "true", "present": "true",
+    "no": "false", "false": "false", "absent": "false"
+}
+
+# Lab value conversions to standard units
+# Note: Some units like mg/dL need context (test_type) for proper conversion
+UNIT_CONVERSIONS = {
+    # Hemoglobin: g/dL → g/L
+    "g/dl": lambda x: x * 10,
+    "g/l": lambda x: x,  # Already in standard unit
+
+    # Glucose: mg/dL → mmol/L
+    "mg/dl": lambda x: x * 0.0555,  # mg/dL to mmol/L (for glucose)
+    "mmol/l": lambda x: x,  # Already in standard unit
+
+    # Creatinine: mg/dL → μmol/L
+    "mg/dl": lambda x: x * 88.4,  # mg/dL to μmol/L (for creatinine)
+    "μmol/l": lambda x: x,  # Already in standard unit
+    "umol/l": lambda x: x,  # Alternative spelling
+
+    # Sodium: mEq/L → mmol/L
+    "meq/l": lambda x: x,  # mEq/L = mmol/L for monovalent ions
+    "mmol/l": lambda x: x,  # Already in standard unit
+
+    # Potassium: mEq/L → mmol/L
+    "meq/l": lambda x: x,  # mEq/L = mmol/L for monovalent ions
+
+    # Calcium: mg/dL → mmol/L
+    "mg/dl": lambda x: x * 0.25,  # mg/dL to mmol/L (for calcium)
+
+    # Bilirubin: mg/dL → μmol/L
+    "mg/dl": lambda x: x * 17.1,  # mg/dL to μmol/L (for bilirubin)
+
+    # Albumin: g/dL → g/L
+    "g/dl": lambda x: x * 10,  # g/dL to g/L (for albumin)
+
+    # Total Protein: g/dL → g/L
+    "g/dl": lambda x: x * 10,  # g/dL to g/L (for total protein)
+
+    # Cholesterol: mg/dL → mmol/L
+    "mg/dl": lambda x: x * 0.0259,  # mg/dL to mmol/L (for cholesterol)
+
+    # Triglycerides: mg/dL → mmol/L
+    "mg/dl": lambda x: x * 0.0113,  # mg/dL to mmol/L (for triglycerides)
+
+    # Urea Nitrogen (BUN): mg/dL → mmol/L
+    "mg/dl": lambda x: x * 0.357,  # mg/dL to mmol/L (for BUN)
+
+    # Uric Acid: mg/dL → μmol/L
+    "mg/dl": lambda x: x * 59.5,  # mg/dL to μmol/L (for uric acid)
+}
+
+# Context-specific conversions for ambiguous units
+CONTEXT_UNIT_CONVERSIONS = {
+    "glucose": {
+        "mg/dl": lambda x: x * 0.0555,  # mg/dL to mmol/L
+        "mmol/l": lambda x: x,
+    },
+    "creatinine": {
+        "mg/dl": lambda x: x * 88.4,  # mg/dL to μmol/L
+        "μmol/l": lambda x: x,
+        "umol/l": lambda x: x,
+    },
+    "calcium": {
+        "mg/dl": lambda x: x * 0.25,  # mg/dL to mmol/L
+        "mmol/l": lambda x: x,
+    },
+    "bilirubin": {
+        "mg/dl": lambda x: x * 17.1,  # mg/dL to μmol/L
+        "μmol/l": lambda x: x,
+        "umol/l": lambda x: x,
+    },
+    "albumin": {
+        "g/dl": lambda x: x * 10,  # g/dL to g/L
+        "g/l": lambda x: x,
+    },
+    "total_protein": {
+        "g/dl": lambda x: x * 10,  # g/dL to g/L
+        "g/l": lambda x: x,
+    },
+    "cholesterol": {
+        "mg/dl": lambda x: x * 0.0259,  # mg/dL to mmol/L
+        "mmol/l": lambda x: x,
+    },
+    "triglycerides": {
+        "mg/dl": lambda x: x * 0.0113,  # mg/dL to mmol/L
+        "mmol/l": lambda x: x,
+    },
+    "bun": {
+        "mg/dl": lambda x: x * 0.357,  # mg/dL to mmol/L
+        "mmol/l": lambda x: x,
+    },
+    "uric_acid": {
+        "mg/dl": lambda x: x * 59.5,  # mg/dL to μmol/L
+        "μmol/l": lambda x: x,
+        "umol/l": lambda x: x,
+    },
+}
+
 def normalize_enum(text: str) -> str:
     """Normalize enum values to standard format"""
     if not text:
@@ -20,13 +136,7 @@ def normalize_enum(text: str) -> str:
     t = text.strip().lower()
     if not t:  # Handle whitespace-only strings
         return None
-    mapping = {
-        "positive": "positive", "pos": "positive", "+": "positive",
-        "negative": "negative", "neg": "negative", "-": "negative",
-        "yes": "true", "true": "true", "present": "true",
-        "no": "false", "false": "false", "absent": "false"
-    }
-    return mapping.get(t, t)   # default to cleaned lowercase if not mapped
+    return ENUM_NORMALIZATION.get(t, t)   # default to cleaned lowercase if not mapped
 
 def normalize_unit(value: float, unit: str, test_type: str = None) -> float:
     """
@@ -49,110 +159,15 @@ def normalize_unit(value: float, unit: str, test_type: str = None) -> float:
     
     unit_clean = unit.strip().lower()
     
-    # Lab value conversions to standard units
-    # Note: Some units like mg/dL need context (test_type) for proper conversion
-    conversions = {
-        # Hemoglobin: g/dL → g/L
-        "g/dl": lambda x: x * 10,
-        "g/l": lambda x: x,  # Already in standard unit
-        
-        # Glucose: mg/dL → mmol/L
-        "mg/dl": lambda x: x * 0.0555,  # mg/dL to mmol/L (for glucose)
-        "mmol/l": lambda x: x,  # Already in standard unit
-        
-        # Creatinine: mg/dL → μmol/L
-        "mg/dl": lambda x: x * 88.4,  # mg/dL to μmol/L (for creatinine)
-        "μmol/l": lambda x: x,  # Already in standard unit
-        "umol/l": lambda x: x,  # Alternative spelling
-        
-        # Sodium: mEq/L → mmol/L
-        "meq/l": lambda x: x,  # mEq/L = mmol/L for monovalent ions
-        "mmol/l": lambda x: x,  # Already in standard unit
-        
-        # Potassium: mEq/L → mmol/L
-        "meq/l": lambda x: x,  # mEq/L = mmol/L for monovalent ions
-        
-        # Calcium: mg/dL → mmol/L
-        "mg/dl": lambda x: x * 0.25,  # mg/dL to mmol/L (for calcium)
-        
-        # Bilirubin: mg/dL → μmol/L
-        "mg/dl": lambda x: x * 17.1,  # mg/dL to μmol/L (for bilirubin)
-        
-        # Albumin: g/dL → g/L
-        "g/dl": lambda x: x * 10,  # g/dL to g/L (for albumin)
-        
-        # Total Protein: g/dL → g/L
-        "g/dl": lambda x: x * 10,  # g/dL to g/L (for total protein)
-        
-        # Cholesterol: mg/dL → mmol/L
-        "mg/dl": lambda x: x * 0.0259,  # mg/dL to mmol/L (for cholesterol)
-        
-        # Triglycerides: mg/dL → mmol/L
-        "mg/dl": lambda x: x * 0.0113,  # mg/dL to mmol/L (for triglycerides)
-        
-        # Urea Nitrogen (BUN): mg/dL → mmol/L
-        "mg/dl": lambda x: x * 0.357,  # mg/dL to mmol/L (for BUN)
-        
-        # Uric Acid: mg/dL → μmol/L
-        "mg/dl": lambda x: x * 59.5,  # mg/dL to μmol/L (for uric acid)
-    }
-    
-    # Context-specific conversions for ambiguous units
-    context_conversions = {
-        "glucose": {
-            "mg/dl": lambda x: x * 0.0555,  # mg/dL to mmol/L
-            "mmol/l": lambda x: x,
-        },
-        "creatinine": {
-            "mg/dl": lambda x: x * 88.4,  # mg/dL to μmol/L
-            "μmol/l": lambda x: x,
-            "umol/l": lambda x: x,
-        },
-        "calcium": {
-            "mg/dl": lambda x: x * 0.25,  # mg/dL to mmol/L
-            "mmol/l": lambda x: x,
-        },
-        "bilirubin": {
-            "mg/dl": lambda x: x * 17.1,  # mg/dL to μmol/L
-            "μmol/l": lambda x: x,
-            "umol/l": lambda x: x,
-        },
-        "albumin": {
-            "g/dl": lambda x: x * 10,  # g/dL to g/L
-            "g/l": lambda x: x,
-        },
-        "total_protein": {
-            "g/dl": lambda x: x * 10,  # g/dL to g/L
-            "g/l": lambda x: x,
-        },
-        "cholesterol": {
-            "mg/dl": lambda x: x * 0.0259,  # mg/dL to mmol/L
-            "mmol/l": lambda x: x,
-        },
-        "triglycerides": {
-            "mg/dl": lambda x: x * 0.0113,  # mg/dL to mmol/L
-            "mmol/l": lambda x: x,
-        },
-        "bun": {
-            "mg/dl": lambda x: x * 0.357,  # mg/dL to mmol/L
-            "mmol/l": lambda x: x,
-        },
-        "uric_acid": {
-            "mg/dl": lambda x: x * 59.5,  # mg/dL to μmol/L
-            "μmol/l": lambda x: x,
-            "umol/l": lambda x: x,
-        },
-    }
-    
     # Try context-specific conversion first if test_type is provided
-    if test_type and test_type.lower() in context_conversions:
-        test_conversions = context_conversions[test_type.lower()]
+    if test_type and test_type.lower() in CONTEXT_UNIT_CONVERSIONS:
+        test_conversions = CONTEXT_UNIT_CONVERSIONS[test_type.lower()]
         if unit_clean in test_conversions:
             return test_conversions[unit_clean](value)
     
     # Apply general conversion if available
-    if unit_clean in conversions:
-        return conversions[unit_clean](value)
+    if unit_clean in UNIT_CONVERSIONS:
+        return UNIT_CONVERSIONS[unit_clean](value)
     
     # Return original value if no conversion available
     logger.debug(f"No unit conversion available for '{unit}' (test_type: {test_type}), returning original value")
@@ -196,10 +211,45 @@ class TrialPredicates:
 class FeatureExtractor:
     """Extract features from FHIR bundles for patient-trial matching"""
     
+    # Resource type -> handler method, resolved once per instance
+    PATIENT_RESOURCE_HANDLERS = {
+        'Patient': '_extract_patient_demographics',
+        'Condition': '_extract_condition',
+        'Observation': '_extract_observation',
+        'MedicationRequest': '_extract_medication',
+    }
+    
+    # Conditions and observations in trials are typically inclusion criteria
+    TRIAL_RESOURCE_HANDLERS = {
+        'ResearchStudy': '_extract_research_study_criteria',
+        'Condition': '_extract_condition_criteria',
+        'Observation': '_extract_observation_criteria',
+    }
+    
+    POSITIVE_VALUES = frozenset({
+        'true', 'yes', 'positive', 'present', 'detected', 'found',
+        'elevated', 'high', 'increased', 'abnormal',
+        '1', 'one', 'on', 'active', 'confirmed'
+    })
+    
+    NEGATIVE_VALUES = frozenset({
+        'false', 'no', 'negative', 'absent', 'not detected', 'not found',
+        'normal', 'low', 'decreased', '0', 'zero', 'off', 'inactive',
+        'unconfirmed', 'none', 'undetected'
+    })
+    
     def __init__(self, emr_mappings_file: str = "data/processed/emr_mappings.json"):
         """Initialize with EMR mappings for normalization"""
         self.emr_mappings = self._load_emr_mappings(emr_mappings_file)
         self.ucum_units = self._load_ucum_units()
+        self._patient_handlers = {
+            resource_type: getattr(self, name)
+            for resource_type, name in self.PATIENT_RESOURCE_HANDLERS.items()
+        }
+        self._trial_handlers = {
+            resource_type: getattr(self, name)
+            for resource_type, name in self.TRIAL_RESOURCE_HANDLERS.items()
+        }
     
     def _load_emr_mappings(self, file_path: str) -> Dict[str, Any]:
         """Load EMR mappings for terminology normalization"""
@@ -300,18 +350,12 @@ class FeatureExtractor:
             logger.warning("Invalid patient bundle format")
             return features
         
+        handlers = self._patient_handlers
         for entry in patient_bundle['entry']:
             resource = entry.get('resource', {})
-            resource_type = resource.get('resourceType')
-            
-            if resource_type == 'Patient':
-                self._extract_patient_demographics(resource, features)
-            elif resource_type == 'Condition':
-                self._extract_condition(resource, features)
-            elif resource_type == 'Observation':
-                self._extract_observation(resource, features)
-            elif resource_type == 'MedicationRequest':
-                self._extract_medication(resource, features)
+            handler = handlers.get(resource.get('resourceType'))
+            if handler:
+                handler(resource, features)
         
         return features
     
@@ -323,18 +367,12 @@ class FeatureExtractor:
             logger.warning("Invalid trial bundle format")
             return predicates
         
+        handlers = self._trial_handlers
         for entry in trial_bundle['entry']:
             resource = entry.get('resource', {})
-            resource_type = resource.get('resourceType')
-            
-            if resource_type == 'ResearchStudy':
-                self._extract_research_study_criteria(resource, predicates)
-            elif resource_type == 'Condition':
-                # Conditions in trials are typically inclusion criteria
-                self._extract_condition_criteria(resource, predicates, is_inclusion=True)
-            elif resource_type == 'Observation':
-                # Observations in trials are typically inclusion criteria
-                self._extract_observation_criteria(resource, predicates, is_inclusion=True)
+            handler = handlers.get(resource.get('resourceType'))
+            if handler:
+                handler(resource, predicates)
         
         return predicates
     
@@ -353,6 +391,18 @@ class FeatureExtractor:
         # Extract gender
         features.gender = patient.get('gender', '').lower()
     
+    @staticmethod
+    def _extract_codings(coding_list: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+        """Copy system/code/display from a FHIR coding list"""
+        return [
+            {
+                'system': coding.get('system', ''),
+                'code': coding.get('code', ''),
+                'display': coding.get('display', '')
+            }
+            for coding in coding_list
+        ]
+    
     def _extract_condition(self, condition: Dict[str, Any], features: PatientFeatures):
         """Extract condition information"""
         condition_info = {
@@ -371,12 +421,7 @@ class FeatureExtractor:
             if coding_list:
                 condition_info['text'] = coding_list[0].get('display', '')
                 # Add all codes
-                for coding in coding_list:
-                    condition_info['codes'].append({
-                        'system': coding.get('system', ''),
-                        'code': coding.get('code', ''),
-                        'display': coding.get('display', '')
-                    })
+                condition_info['codes'] = self._extract_codings(coding_list)
             
             # Fallback to text if no coding
             if not condition_info['text']:
@@ -417,12 +462,7 @@ class FeatureExtractor:
             coding_list = code.get('coding', [])
             if coding_list:
                 obs_info['text'] = coding_list[0].get('display', '')
-                for coding in coding_list:
-                    obs_info['codes'].append({
-                        'system': coding.get('system', ''),
-                        'code': coding.get('code', ''),
-                        'display': coding.get('display', '')
-                    })
+                obs_info['codes'] = self._extract_codings(coding_list)
             
             if not obs_info['text']:
                 obs_info['text'] = code.get('text', '')
@@ -471,12 +511,10 @@ class FeatureExtractor:
             obs_info['category'] = category_coding.get('code', '')
         
         # Categorize observation
-        if obs_info['category'] == 'vital-signs':
-            if obs_info['text'].lower() in ['blood pressure', 'systolic', 'diastolic']:
-                features.vital_signs[obs_info['text'].lower()] = obs_info
-            else:
-                features.vital_signs[obs_info['text'].lower()] = obs_info
-        elif obs_info['category'] == 'laboratory':
+        category_code = obs_info['category']
+        if category_code == 'vital-signs':
+            features.vital_signs[obs_info['text'].lower()] = obs_info
+        elif category_code == 'laboratory':
             features.lab_results.append(obs_info)
         else:
             features.observations.append(obs_info)
@@ -497,12 +535,7 @@ class FeatureExtractor:
             coding_list = medication_codeable.get('coding', [])
             if coding_list:
                 med_info['text'] = coding_list[0].get('display', '')
-                for coding in coding_list:
-                    med_info['codes'].append({
-                        'system': coding.get('system', ''),
-                        'code': coding.get('code', ''),
-                        'display': coding.get('display', '')
-                    })
+                med_info['codes'] = self._extract_codings(coding_list)
             
             if not med_info['text']:
                 med_info['text'] = medication_codeable.get('text', '')
@@ -702,23 +735,9 @@ class FeatureExtractor:
         
         text_lower = text.lower().strip()
         
-        # Positive values
-        positive_values = {
-            'true', 'yes', 'positive', 'present', 'detected', 'found',
-            'elevated', 'high', 'increased', 'abnormal', 'positive',
-            '1', 'one', 'on', 'active', 'confirmed'
-        }
-        
-        # Negative values
-        negative_values = {
-            'false', 'no', 'negative', 'absent', 'not detected', 'not found',
-            'normal', 'low', 'decreased', '0', 'zero', 'off', 'inactive',
-            'unconfirmed', 'none', 'undetected'
-        }
-        
-        if text_lower in positive_values:
+        if text_lower in self.POSITIVE_VALUES:
             return True
-        elif text_lower in negative_values:
+        elif text_lower in self.NEGATIVE_VALUES:
             return False
         
         return None
@@ -871,12 +890,7 @@ class FeatureExtractor:
             coding_list = code.get('coding', [])
             if coding_list:
                 criteria['text'] = coding_list[0].get('display', '')
-                for coding in coding_list:
-                    criteria['codes'].append({
-                        'system': coding.get('system', ''),
-                        'code': coding.get('code', ''),
-                        'display': coding.get('display', '')
-                    })
+                criteria['codes'] = self._extract_codings(coding_list)
             
             if not criteria['text']:
                 criteria['text'] = code.get('text', '')
@@ -915,12 +929,7 @@ class FeatureExtractor:
             coding_list = code.get('coding', [])
             if coding_list:
                 criteria['text'] = coding_list[0].get('display', '')
-                for coding in coding_list:
-                    criteria['codes'].append({
-                        'system': coding.get('system', ''),
-                        'code': coding.get('code', ''),
-                        'display': coding.get('display', '')
-                    })
+                criteria['codes'] = self._extract_codings(coding_list)
             
             if not criteria['text']:
                 criteria['text'] = code.get('text', '')
@@ -943,7 +952,7 @@ class FeatureExtractor:
         text_lower = text.lower()
         
         # Split into sentences
-        sentences = re.split(r'[.!?]+', text)
+        sentences = SENTENCE_SPLIT_PATTERN.split(text)
         
         for sentence in sentences:
             sentence = sentence.strip()
@@ -973,8 +982,9 @@ class FeatureExtractor:
         entities = []
         
         # Look for known terms in EMR mappings
+        text_lower = text.lower()
         for term, mapping in self.emr_mappings.items():
-            if term.lower() in text.lower():
+            if term.lower() in text_lower:
                 entities.append({
                     'text': term,
                     'type': 'mapped_term',
@@ -982,14 +992,8 @@ class FeatureExtractor:
                 })
         
         # Look for age patterns
-        age_patterns = [
-            r'(\d+)\s*(?:years?|yrs?|y)\s*old',
-            r'age\s*(?:of\s*)?(\d+)',
-            r'(\d+)\s*(?:years?|yrs?|y)'
-        ]
-        
-        for pattern in age_patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
+        for pattern in TEXT_AGE_PATTERNS:
+            match = pattern.search(text)
             if match:
                 entities.append({
                     'text': match.group(0),
@@ -998,14 +1002,8 @@ class FeatureExtractor:
                 })
         
         # Look for lab value patterns
-        lab_patterns = [
-            r'(\d+(?:\.\d+)?)\s*(mg/dL|mmol/L|g/dL|ng/mL|pg/mL|U/L|mIU/L)',
-            r'(\d+(?:\.\d+)?)\s*(mmHg|mm Hg|°C|°F)'
-        ]
-        
-        for pattern in lab_patterns:
-            matches = re.finditer(pattern, text, re.IGNORECASE)
-            for match in matches:
+        for pattern in TEXT_LAB_PATTERNS:
+            for match in pattern.finditer(text):
                 entities.append({
                     'text': match.group(0),
                     'type': 'lab_value',
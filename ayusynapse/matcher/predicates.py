@@ -10,14 +10,20 @@ from dataclasses import dataclass
 from enum import Enum
 import logging
 
-# Import the normalization helper
+# Import the normalization helpers
 try:
-    from .features import normalize_enum
+    from .features import normalize_enum, normalize_unit
 except ImportError:
-    from matcher.features import normalize_enum
+    from matcher.features import normalize_enum, normalize_unit
 
 logger = logging.getLogger(__name__)
 
+# Operator groups checked on every predicate evaluation
+PRESENCE_OPERATORS = frozenset({"present", "absent"})
+COMPARISON_OPERATORS = frozenset({"==", "!=", ">=", "<=", ">", "<"})
+SET_OPERATORS = frozenset({"in", "not_in"})
+VALUE_OPERATORS = COMPARISON_OPERATORS | SET_OPERATORS | {"range"}
+
 class PredicateType(Enum):
     """Types of predicates"""
     PATIENT = "Patient"
@@ -66,7 +72,7 @@ class Predicate:
         if not self.field and not self.code:
             raise ValueError("Predicate must have either field or code specified")
         
-        if self.op in ["==", "!=", ">=", "<=", ">", "<", "in", "not_in", "range"] and self.value is None:
+        if self.op in VALUE_OPERATORS and self.value is None:
             raise ValueError(f"Operator {self.op} requires a value")
 
 class PredicateEvaluator:
@@ -160,7 +166,7 @@ class PredicateEvaluator:
                 "match": False,
                 "evidence": f"Patient age is present: {patient_age} years"
             }
-        elif predicate.op in [">=", "<=", ">", "<", "==", "!="]:
+        elif predicate.op in COMPARISON_OPERATORS:
             return self._evaluate_comparison(patient_age, predicate.op, predicate.value, "age")
         elif predicate.op == "range":
             if isinstance(predicate.value, (list, tuple)) and len(predicate.value) == 2:
@@ -237,7 +243,7 @@ class PredicateEvaluator:
                     "match": False,
                     "evidence": f"Patient gender {patient_gender} matches excluded {predicate.value}"
                 }
-        elif predicate.op in ["in", "not_in"]:
+        elif predicate.op in SET_OPERATORS:
             if isinstance(predicate.value, (list, tuple)):
                 value_list = [str(v).lower() for v in predicate.value]
                 if predicate.op == "in":
@@ -279,7 +285,7 @@ class PredicateEvaluator:
         """Evaluate condition-based predicates"""
         patient_conditions = patient_features.get('conditions', [])
         
-        if predicate.op in ["present", "absent"]:
+        if predicate.op in PRESENCE_OPERATORS:
             return self._evaluate_condition_presence(patient_conditions, predicate)
         else:
             return {
@@ -438,7 +444,7 @@ class PredicateEvaluator:
 
     def _evaluate_observation_value(self, observation: Dict, predicate: Predicate) -> Dict[str, Any]:
         """Evaluate observation value against predicate"""
-        if predicate.op in ["present", "absent"]:
+        if predicate.op in PRESENCE_OPERATORS:
             if predicate.op == "present":
                 return {
                     "match": True,
@@ -499,12 +505,6 @@ class PredicateEvaluator:
             # The observation value should already be normalized from feature extraction
             # But we need to normalize the predicate value for comparison
             if predicate.unit:
-                # Import the normalize_unit function
-                try:
-                    from .features import normalize_unit
-                except ImportError:
-                    from matcher.features import normalize_unit
-                
                 # Normalize predicate value to standard units
                 normalized_pred_value = normalize_unit(predicate.value, predicate.unit)
                 predicate_value = normalized_pred_value
@@ -524,7 +524,7 @@ class PredicateEvaluator:
         """Evaluate medication-based predicates"""
         patient_medications = patient_features.get('medications', [])
         
-        if predicate.op in ["present", "absent"]:
+        if predicate.op in PRESENCE_OPERATORS:
             return self._evaluate_medication_presence(patient_medications, predicate)
         else:
             return {
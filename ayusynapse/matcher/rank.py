@@ -42,6 +42,18 @@ class RankedTrial:
 class TrialRanker:
     """Ranks trials based on score, thresholds, and tie-breaking rules"""
     
+    # Recruiting status -> priority number (lower = higher priority)
+    STATUS_PRIORITIES = {
+        "Recruiting": 1,
+        "Active, not recruiting": 2,
+        "Not yet recruiting": 3,
+        "Completed": 4,
+        "Terminated": 5,
+        "Suspended": 6,
+        "Withdrawn": 7,
+        "Unknown": 8
+    }
+    
     def __init__(self, min_score: float = 60.0, priority_threshold: float = 50.0):
         """
         Initialize the trial ranker
@@ -92,11 +104,11 @@ class TrialRanker:
         # Apply priority rules for special cases
         priority_trials = self._apply_priority_rules(filtered_trials)
         
-        # Sort by final score (descending)
-        sorted_trials = sorted(priority_trials, key=lambda rt: rt.final_score, reverse=True)
+        # Sort by final score (descending), breaking ties in the same pass
+        sorted_trials = sorted(priority_trials, key=self._sort_key)
         
-        # Apply tie-breaking
-        sorted_trials = self._apply_tie_breakers(sorted_trials)
+        # Explain how ties were broken
+        self._apply_tie_breakers(sorted_trials)
         
         # Set ranks
         for i, trial in enumerate(sorted_trials, 1):
@@ -104,6 +116,30 @@ class TrialRanker:
         
         return sorted_trials
     
+    def build_ranking_info(self, results: List[Tuple[str, TrialMatchResult]]) -> Dict[str, TrialRankingInfo]:
+        """
+        Create default ranking info for evaluated trials
+        
+        Recruiting status and must-have biomarkers would come from trial
+        metadata; until then every trial is treated as recruiting.
+        
+        Args:
+            results: List of (trial_id, TrialMatchResult) tuples
+            
+        Returns:
+            Dict of trial_id -> TrialRankingInfo
+        """
+        return {
+            trial_id: TrialRankingInfo(
+                trial_id=trial_id,
+                recruiting_status="Recruiting",  # Default - would come from trial metadata
+                must_have_biomarkers=[],  # Would be extracted from trial criteria
+                has_all_must_have=False,  # Would be determined by analysis
+                zero_exclusions=len(result.exclusions_triggered) == 0
+            )
+            for trial_id, result in results
+        }
+    
     def _calculate_final_score(self, result: TrialMatchResult, info: TrialRankingInfo) -> float:
         """
         Calculate final score with priority boost
@@ -171,88 +207,49 @@ class TrialRanker:
         
         return priority_trials
     
-    def _apply_tie_breakers(self, trials: List[RankedTrial]) -> List[RankedTrial]:
+    def _sort_key(self, trial: RankedTrial) -> Tuple:
         """
-        Apply tie-breaking rules when trials have the same score
+        Sort key ordering trials by score, then by the tie-breaking criteria
         
         Args:
-            trials: List of ranked trials sorted by score
+            trial: Ranked trial
             
         Returns:
-            List with tie-breaking applied
+            Tuple that sorts best trials first
         """
-        if len(trials) <= 1:
-            return trials
-        
-        # Group trials by score
-        score_groups = {}
-        for trial in trials:
-            score = trial.final_score
-            if score not in score_groups:
-                score_groups[score] = []
-            score_groups[score].append(trial)
-        
-        # Apply tie-breaking within each score group
-        final_trials = []
-        for score in sorted(score_groups.keys(), reverse=True):
-            group = score_groups[score]
-            
-            if len(group) == 1:
-                final_trials.append(group[0])
-            else:
-                # Apply tie-breaking rules
-                sorted_group = self._break_ties(group)
-                final_trials.extend(sorted_group)
-        
-        return final_trials
+        info = trial.ranking_info
+        return (
+            # Final score (higher first)
+            -trial.final_score,
+            # 1. Recruiting status (recruiting first)
+            self._recruiting_status_priority(info.recruiting_status),
+            # 2. Start date (newer first)
+            self._date_priority(info.start_date),
+            # 3. Priority boost (higher first)
+            -info.priority_boost,
+            # 4. Trial ID (alphabetical for consistency)
+            trial.trial_id
+        )
     
-    def _break_ties(self, trials: List[RankedTrial]) -> List[RankedTrial]:
+    def _apply_tie_breakers(self, trials: List[RankedTrial]) -> List[RankedTrial]:
         """
-        Break ties between trials with the same score
+        Record tie-breaker reasons for trials that share a score
         
         Args:
-            trials: List of trials with the same score
+            trials: List of ranked trials sorted by _sort_key
             
         Returns:
-            List sorted by tie-breaking criteria
+            The same list, with tie_breaker_reason set on tied trials
         """
-        if len(trials) <= 1:
-            return trials
-        
-        # Sort by multiple criteria
-        sorted_trials = sorted(trials, key=lambda t: (
-            # 1. Recruiting status (recruiting first)
-            self._recruiting_status_priority(t.ranking_info.recruiting_status),
-            # 2. Start date (newer first)
-            self._date_priority(t.ranking_info.start_date),
-            # 3. Priority boost (higher first)
-            -t.ranking_info.priority_boost,
-            # 4. Trial ID (alphabetical for consistency)
-            t.trial_id
-        ))
+        for prev_trial, trial in zip(trials, trials[1:]):
+            if trial.final_score == prev_trial.final_score:
+                trial.tie_breaker_reason = self._get_tie_breaker_reason(trial, prev_trial)
         
-        # Add tie-breaker reasons
-        for i, trial in enumerate(sorted_trials):
-            if i > 0:
-                prev_trial = sorted_trials[i-1]
-                if trial.final_score == prev_trial.final_score:
-                    trial.tie_breaker_reason = self._get_tie_breaker_reason(trial, prev_trial)
-        
-        return sorted_trials
+        return trials
     
     def _recruiting_status_priority(self, status: str) -> int:
         """Convert recruiting status to priority number (lower = higher priority)"""
-        status_priorities = {
-            "Recruiting": 1,
-            "Active, not recruiting": 2,
-            "Not yet recruiting": 3,
-            "Completed": 4,
-            "Terminated": 5,
-            "Suspended": 6,
-            "Withdrawn": 7,
-            "Unknown": 8
-        }
-        return status_priorities.get(status, 8)
+        return self.STATUS_PRIORITIES.get(status, 8)
     
     def _date_priority(self, start_date: Optional[datetime]) -> int:
         """Convert start date to priority number (lower = higher priority)"""
@@ -300,22 +297,32 @@ class TrialRanker:
             return {"total_trials": 0, "eligible_trials": 0}
         
         total_trials = len(ranked_trials)
-        eligible_trials = len([rt for rt in ranked_trials if rt.result.eligible])
-        
-        # Score distribution
-        score_ranges = {
-            "excellent": len([rt for rt in ranked_trials if rt.final_score >= 90]),
-            "good": len([rt for rt in ranked_trials if 80 <= rt.final_score < 90]),
-            "fair": len([rt for rt in ranked_trials if 70 <= rt.final_score < 80]),
-            "marginal": len([rt for rt in ranked_trials if 60 <= rt.final_score < 70])
-        }
-        
-        # Priority trials
-        priority_trials = len([rt for rt in ranked_trials if rt.ranking_info.priority_boost > 0])
-        
-        # Recruiting status distribution
+        eligible_trials = 0
+        priority_trials = 0
+        score_ranges = {"excellent": 0, "good": 0, "fair": 0, "marginal": 0}
         recruiting_counts = {}
+        
+        # Single pass over the ranked trials for all counts
         for rt in ranked_trials:
+            if rt.result.eligible:
+                eligible_trials += 1
+            
+            # Score distribution
+            score = rt.final_score
+            if score >= 90:
+                score_ranges["excellent"] += 1
+            elif score >= 80:
+                score_ranges["good"] += 1
+            elif score >= 70:
+                score_ranges["fair"] += 1
+            elif score >= 60:
+                score_ranges["marginal"] += 1
+            
+            # Priority trials
+            if rt.ranking_info.priority_boost > 0:
+                priority_trials += 1
+            
+            # Recruiting status distribution
             status = rt.ranking_info.recruiting_status
             recruiting_counts[status] = recruiting_counts.get(status, 0) + 1
         
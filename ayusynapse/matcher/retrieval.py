@@ -4,9 +4,12 @@ Patient-Trial Retrieval Module
 """
 
 import json
+import hashlib
 import logging
+import os
 import requests
-from typing import List, Dict, Any, Optional
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Tuple
 from dataclasses import dataclass
 from datetime import datetime
 import re
@@ -14,6 +17,15 @@ import re
 logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
 logger = logging.getLogger(__name__)
 
+# Read size used when hashing trial data files
+HASH_CHUNK_SIZE = 1 << 18
+
+# Coding systems whose codes count as patient conditions
+CONDITION_CODE_SYSTEMS = frozenset({
+    'http://snomed.info/sct',
+    'http://hl7.org/fhir/sid/icd-10-cm'
+})
+
 @dataclass
 class Trial:
     """Trial candidate with metadata"""
@@ -25,6 +37,16 @@ class Trial:
     fhir_bundle_id: Optional[str] = None
     resource_count: int = 0
 
+@dataclass
+class IndexedTrial:
+    """Trial with its scorable criteria entities pre-normalized"""
+    trial_id: str
+    nct_id: str
+    title: str
+    resource_count: int
+    # (entity_type, lowercased entity text, normalized value) in criteria order
+    entities: Tuple[Tuple[str, str, Any], ...]
+
 def extract_patient_codes(patient_fhir: Dict) -> Dict[str, List[str]]:
     """
     Extract standardized codes from patient FHIR resources
@@ -51,6 +73,10 @@ def extract_patient_codes(patient_fhir: Dict) -> Dict[str, List[str]]:
         else:
             resources = [patient_fhir] if isinstance(patient_fhir, dict) else patient_fhir
         
+        add_condition = codes['snomed_conditions'].append
+        add_observation = codes['loinc_observations'].append
+        add_medication = codes['rxnorm_medications'].append
+        
         for resource in resources:
             resource_type = resource.get('resourceType')
             
@@ -69,27 +95,28 @@ def extract_patient_codes(patient_fhir: Dict) -> Dict[str, List[str]]:
                     codes['gender'] = resource['gender']
             
             elif resource_type == 'Condition':
-                # Extract SNOMED CT codes
-                if 'code' in resource and 'coding' in resource['code']:
-                    for coding in resource['code']['coding']:
-                        if coding.get('system') == 'http://snomed.info/sct':
-                            codes['snomed_conditions'].append(coding.get('code'))
-                        elif coding.get('system') == 'http://hl7.org/fhir/sid/icd-10-cm':
-                            codes['snomed_conditions'].append(coding.get('code'))
+                # Extract SNOMED CT (and ICD-10) codes
+                code = resource.get('code')
+                if code and 'coding' in code:
+                    for coding in code['coding']:
+                        if coding.get('system') in CONDITION_CODE_SYSTEMS:
+                            add_condition(coding.get('code'))
             
             elif resource_type == 'Observation':
                 # Extract LOINC codes
-                if 'code' in resource and 'coding' in resource['code']:
-                    for coding in resource['code']['coding']:
+                code = resource.get('code')
+                if code and 'coding' in code:
+                    for coding in code['coding']:
                         if coding.get('system') == 'http://loinc.org':
-                            codes['loinc_observations'].append(coding.get('code'))
+                            add_observation(coding.get('code'))
             
             elif resource_type == 'MedicationRequest':
                 # Extract RxNorm codes
-                if 'medicationCodeableConcept' in resource and 'coding' in resource['medicationCodeableConcept']:
-                    for coding in resource['medicationCodeableConcept']['coding']:
+                medication = resource.get('medicationCodeableConcept')
+                if medication and 'coding' in medication:
+                    for coding in medication['coding']:
                         if coding.get('system') == 'http://www.nlm.nih.gov/research/umls/rxnorm':
-                            codes['rxnorm_medications'].append(coding.get('code'))
+                            add_medication(coding.get('code'))
         
         logger.info(f"📋 Extracted codes: {len(codes['snomed_conditions'])} conditions, "
                    f"{len(codes['loinc_observations'])} observations, "
@@ -100,6 +127,119 @@ def extract_patient_codes(patient_fhir: Dict) -> Dict[str, List[str]]:
     
     return codes
 
+def _parse_trial_data(local_bundle_file: str) -> Dict:
+    """Parse a local trial data file"""
+    with open(local_bundle_file, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+@lru_cache(maxsize=128)
+def _hash_file(local_bundle_file: str, inode: int, mtime_ns: int, size: int) -> str:
+    """
+    Hash a file's contents; the stat fields only key the cache
+    
+    The file is streamed through one reusable buffer with readinto() rather
+    than read into a single bytes object, so hashing a large trial file does
+    not allocate a copy of it.
+    """
+    digest = hashlib.sha256()
+    buffer = bytearray(HASH_CHUNK_SIZE)
+    view = memoryview(buffer)
+    with open(local_bundle_file, 'rb') as f:
+        while True:
+            n = f.readinto(buffer)
+            if not n:
+                break
+            digest.update(view[:n])
+    return digest.hexdigest()
+
+def _content_hash(local_bundle_file: str) -> str:
+    """
+    SHA-256 of a trial data file, used to key the trial index cache
+    
+    The file is only read again when its inode, modification time or size
+    changes, so repeated requests against an unchanged file cost a single stat
+    call, and a same-size file swapped in with os.replace is still re-read.
+    """
+    stat = os.stat(local_bundle_file)
+    return _hash_file(local_bundle_file, stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+def build_trial_index(extracted_data: Dict) -> Tuple[IndexedTrial, ...]:
+    """
+    Pre-normalize the trial side of local matching
+    
+    Lowercasing entity text, parsing trial ages and dropping entities that
+    can never score does not depend on the patient, so it is done once here
+    instead of for every patient.
+    
+    Args:
+        extracted_data: Parsed trial data
+        
+    Returns:
+        Indexed trials in file order
+    """
+    index = []
+    
+    for trial in extracted_data.get('trials', []):
+        entities = []
+        
+        for criteria in trial.get('criteria', []):
+            for entity in criteria.get('entities', []):
+                entity_type = entity.get('entity_type')
+                entity_text = entity.get('text', '').lower()
+                value = None
+                
+                if entity_type == 'DIAGNOSIS':
+                    # Only cancer-related terms are scored
+                    if not any(term in entity_text for term in ['cancer', 'carcinoma', 'adenocarcinoma', 'biliary']):
+                        continue
+                elif entity_type == 'BIOMARKER':
+                    # Only HER2 positive is scored
+                    if not ('her2' in entity_text and 'positive' in entity_text):
+                        continue
+                elif entity_type == 'AGE':
+                    try:
+                        value = int(entity.get('value', 0))
+                    except (ValueError, TypeError):
+                        continue
+                elif entity_type == 'GENDER':
+                    value = (entity.get('value') or '').lower()
+                elif entity_type != 'MEDICATION':
+                    continue
+                
+                entities.append((entity_type, entity_text, value))
+        
+        index.append(IndexedTrial(
+            trial_id=trial.get('trial_id'),
+            nct_id=trial.get('nct_id', ''),
+            title=trial.get('title', ''),
+            resource_count=len(trial.get('criteria', [])),
+            entities=tuple(entities)
+        ))
+    
+    return tuple(index)
+
+@lru_cache(maxsize=128)
+def _trial_index(content_hash: str, local_bundle_file: str) -> Tuple[IndexedTrial, ...]:
+    """
+    Build the trial index for a file, cached by content hash
+    
+    The file is only parsed on a cache miss; ``content_hash`` is part of the
+    key so an edited file is indexed again instead of serving stale trials.
+    """
+    return build_trial_index(_parse_trial_data(local_bundle_file))
+
+def load_trial_index(local_bundle_file: str = 'extracted_criteria_data.json') -> Tuple[IndexedTrial, ...]:
+    """
+    Load the trial index, rebuilding it only when the file contents change
+    
+    Args:
+        local_bundle_file: Path to local extracted data file
+        
+    Returns:
+        Indexed trials (shared between callers, do not mutate)
+    """
+    return _trial_index(_content_hash(local_bundle_file), local_bundle_file)
+
 def search_local_trials(patient_codes: Dict, local_bundle_file: str = 'extracted_criteria_data.json') -> List[Trial]:
     """
     Search local trial bundles for matching candidates
@@ -114,80 +254,71 @@ def search_local_trials(patient_codes: Dict, local_bundle_file: str = 'extracted
     candidates = []
     
     try:
-        with open(local_bundle_file, 'r', encoding='utf-8') as f:
-            extracted_data = json.load(f)
+        trial_index = load_trial_index(local_bundle_file)
+        
+        # Patient-side lookups are the same for every trial entity, so
+        # lowercase the codes and resolve the keyword flags once up front
+        condition_codes = [code.lower() for code in patient_codes['snomed_conditions'] if code is not None]
+        medication_codes = [code.lower() for code in patient_codes['rxnorm_medications'] if code is not None]
+        has_biliary_condition = any('biliary' in code for code in condition_codes)
+        has_her2_observation = any('her2' in code.lower() for code in patient_codes['loinc_observations'] if code is not None)
+        patient_age = patient_codes['age']
+        patient_gender = patient_codes['gender'].lower() if patient_codes['gender'] else None
         
-        for trial in extracted_data.get('trials', []):
-            trial_id = trial.get('trial_id')
-            nct_id = trial.get('nct_id', '')
-            title = trial.get('title', '')
+        for trial in trial_index:
             score = 0.0
             match_reasons = []
             
-            # Check each criteria and its entities
-            for criteria in trial.get('criteria', []):
-                for entity in criteria.get('entities', []):
-                    entity_type = entity.get('entity_type')
-                    entity_text = entity.get('text', '').lower()
-                    
-                    # Match conditions (biliary tract cancer)
-                    if entity_type == 'DIAGNOSIS':
-                        # Check for cancer-related terms
-                        if any(term in entity_text for term in ['cancer', 'carcinoma', 'adenocarcinoma', 'biliary']):
-                            # Check if patient has biliary tract cancer
-                            if 'biliary' in entity_text and any('biliary' in code.lower() for code in patient_codes['snomed_conditions']):
-                                score += 3.0
-                                match_reasons.append(f"Biliary cancer match: {entity_text}")
-                            elif any(condition_code.lower() in entity_text for condition_code in patient_codes['snomed_conditions']):
-                                score += 2.0
-                                match_reasons.append(f"Condition match: {entity_text}")
-                    
-                    # Match biomarkers (HER2 positive)
-                    elif entity_type == 'BIOMARKER':
-                        if 'her2' in entity_text and 'positive' in entity_text:
-                            # Check if patient has HER2 positive
-                            if any('her2' in obs_code.lower() for obs_code in patient_codes['loinc_observations']):
-                                score += 2.5
-                                match_reasons.append(f"HER2 positive match: {entity_text}")
-                            else:
-                                score += 1.5
-                                match_reasons.append(f"Biomarker match: {entity_text}")
-                    
-                    # Match medications
-                    elif entity_type == 'MEDICATION':
-                        for med_code in patient_codes['rxnorm_medications']:
-                            if med_code.lower() in entity_text:
-                                score += 1.0
-                                match_reasons.append(f"Medication match: {entity_text}")
-                    
-                    # Match age criteria
-                    elif entity_type == 'AGE' and patient_codes['age']:
-                        try:
-                            trial_age = int(entity.get('value', 0))
-                            patient_age = patient_codes['age']
-                            if abs(trial_age - patient_age) <= 10:  # Within 10 years
-                                score += 0.5
-                                match_reasons.append(f"Age match: {entity_text}")
-                        except (ValueError, TypeError):
-                            pass
-                    
-                    # Match gender criteria
-                    elif entity_type == 'GENDER' and patient_codes['gender']:
-                        trial_gender = entity.get('value', '').lower()
-                        patient_gender = patient_codes['gender'].lower()
-                        if trial_gender in ['all', 'unknown'] or trial_gender == patient_gender:
-                            score += 0.3
-                            match_reasons.append(f"Gender match: {entity_text}")
+            # Check each scorable criteria entity
+            for entity_type, entity_text, value in trial.entities:
+                # Match conditions (biliary tract cancer)
+                if entity_type == 'DIAGNOSIS':
+                    # Check if patient has biliary tract cancer
+                    if 'biliary' in entity_text and has_biliary_condition:
+                        score += 3.0
+                        match_reasons.append(f"Biliary cancer match: {entity_text}")
+                    elif any(condition_code in entity_text for condition_code in condition_codes):
+                        score += 2.0
+                        match_reasons.append(f"Condition match: {entity_text}")
+                
+                # Match biomarkers (HER2 positive)
+                elif entity_type == 'BIOMARKER':
+                    # Check if patient has HER2 positive
+                    if has_her2_observation:
+                        score += 2.5
+                        match_reasons.append(f"HER2 positive match: {entity_text}")
+                    else:
+                        score += 1.5
+                        match_reasons.append(f"Biomarker match: {entity_text}")
+                
+                # Match medications
+                elif entity_type == 'MEDICATION':
+                    for med_code in medication_codes:
+                        if med_code in entity_text:
+                            score += 1.0
+                            match_reasons.append(f"Medication match: {entity_text}")
+                
+                # Match age criteria
+                elif entity_type == 'AGE' and patient_age:
+                    if abs(value - patient_age) <= 10:  # Within 10 years
+                        score += 0.5
+                        match_reasons.append(f"Age match: {entity_text}")
+                
+                # Match gender criteria
+                elif entity_type == 'GENDER' and patient_gender:
+                    if value in ['all', 'unknown'] or value == patient_gender:
+                        score += 0.3
+                        match_reasons.append(f"Gender match: {entity_text}")
             
             # Add trial if it has any matches
             if score > 0:
                 candidates.append(Trial(
-                    trial_id=trial_id,
-                    nct_id=nct_id,
-                    title=title,
+                    trial_id=trial.trial_id,
+                    nct_id=trial.nct_id,
+                    title=trial.title,
                     score=score,
                     match_reasons=match_reasons,
-                    resource_count=len(trial.get('criteria', []))
+                    resource_count=trial.resource_count
                 ))
         
         # Sort by score (highest first)
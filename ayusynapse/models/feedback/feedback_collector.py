@@ -2,14 +2,32 @@
 Feedback Collector - Captures and stores user feedback on trial matching results
 """
 
+import copy
+import functools
 import json
 import logging
+import os
+import tempfile
+import threading
 import uuid
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Dict, List, Any, Optional
-from dataclasses import dataclass, asdict
+from typing import Dict, List, Any, Optional, Callable
+from dataclasses import dataclass
 from pathlib import Path
 
+# fcntl is POSIX-only; without it writes are only serialized within a process
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# orjson is optional; when installed it is used for the feedback file round-trips
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -27,12 +45,45 @@ class FeedbackEntry:
     suggested_corrections: Optional[Dict] = None
     metadata: Optional[Dict] = None
 
+def _log_errors(action: str, fallback: Optional[Callable[[], Any]] = None, reraise: bool = False):
+    """
+    Log any exception from a FeedbackCollector method as "Error <action>"
+    
+    The exception is re-raised when reraise is set; otherwise the method
+    returns fallback() (or None when no fallback is given).
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            try:
+                return method(self, *args, **kwargs)
+            except Exception as e:
+                self.logger.error(f"Error {action}: {e}")
+                if reraise:
+                    raise
+                return fallback() if fallback is not None else None
+        return wrapper
+    return decorator
+
 class FeedbackCollector:
     """Collects and manages user feedback on trial matching results"""
     
+    # Entry fields with an in-memory lookup index
+    INDEXED_FIELDS = ('prediction_id', 'trial_id', 'user_id')
+    
     def __init__(self, feedback_file: str = "feedback_data.json"):
         self.feedback_file = Path(feedback_file)
         self.logger = logging.getLogger(__name__)
+        # Parsed feedback kept in memory, keyed on the file's (inode, mtime_ns, size)
+        self._lock = threading.Lock()
+        self._cached_feedback: Optional[List[Dict]] = None
+        self._cached_stat: Optional[tuple] = None
+        self._indexes: Optional[Dict[str, Dict[str, List[Dict]]]] = None
+        # Serializes load-append-save so concurrent batches don't drop each other's
+        # entries: the thread lock within this instance, an flock on a sidecar
+        # file across instances and worker processes
+        self._write_lock = threading.Lock()
+        self._lock_file = self.feedback_file.with_name(f"{self.feedback_file.name}.lock")
         self._ensure_feedback_file()
     
     def _ensure_feedback_file(self):
@@ -68,147 +119,229 @@ class FeedbackCollector:
         Returns:
             feedback_id: Unique identifier for the feedback entry
         """
-        try:
-            feedback_id = str(uuid.uuid4())
-            
-            feedback_entry = FeedbackEntry(
-                feedback_id=feedback_id,
-                prediction_id=prediction_id,
-                trial_id=trial_id,
-                patient_id=patient_id,
-                feedback_type=feedback_type,
-                confidence_score=confidence_score,
-                user_id=user_id,
-                timestamp=datetime.now().isoformat(),
-                comments=comments,
-                suggested_corrections=suggested_corrections,
-                metadata=metadata
-            )
-            
-            # Load existing feedback
-            feedback_data = self._load_feedback()
+        return self.collect_feedback_batch([{
+            'prediction_id': prediction_id,
+            'trial_id': trial_id,
+            'patient_id': patient_id,
+            'confidence_score': confidence_score,
+            'user_id': user_id,
+            'feedback_type': feedback_type,
+            'comments': comments,
+            'suggested_corrections': suggested_corrections,
+            'metadata': metadata
+        }])[0]
+    
+    @_log_errors("collecting feedback", reraise=True)
+    def collect_feedback_batch(self, feedback_items: List[Dict[str, Any]]) -> List[str]:
+        """
+        Collect several feedback entries with a single load/save of the feedback file
+        
+        Args:
+            feedback_items: Dicts holding the keyword arguments of collect_feedback
+        
+        Returns:
+            List of feedback_ids, in the same order as feedback_items
+        """
+        if not feedback_items:
+            return []
+        
+        timestamp = datetime.now().isoformat()
+        
+        new_entries = [
+            vars(FeedbackEntry(
+                feedback_id=str(uuid.uuid4()),
+                prediction_id=item['prediction_id'],
+                trial_id=item['trial_id'],
+                patient_id=item['patient_id'],
+                feedback_type=item['feedback_type'],
+                confidence_score=item['confidence_score'],
+                user_id=item['user_id'],
+                timestamp=timestamp,
+                comments=item.get('comments'),
+                # Copied so later edits to the caller's dicts don't reach the cache
+                suggested_corrections=copy.deepcopy(item.get('suggested_corrections')),
+                metadata=copy.deepcopy(item.get('metadata'))
+            ))
+            for item in feedback_items
+        ]
+        
+        with self._write_lock, self._file_lock():
+            # Load existing feedback; an unreadable store raises rather than
+            # being overwritten with only the new entries
+            feedback_data = self._read_feedback()
             
             # Add new feedback
-            feedback_data.append(asdict(feedback_entry))
+            feedback_data.extend(new_entries)
             
             # Save updated feedback
             self._save_feedback(feedback_data)
-            
-            self.logger.info(f"Feedback collected: {feedback_id} for prediction {prediction_id}")
-            return feedback_id
-            
-        except Exception as e:
-            self.logger.error(f"Error collecting feedback: {e}")
-            raise
+        
+        for entry in new_entries:
+            self.logger.info(f"Feedback collected: {entry['feedback_id']} for prediction {entry['prediction_id']}")
+        return [entry['feedback_id'] for entry in new_entries]
     
+    @_log_errors("getting feedback by prediction")
     def get_feedback_by_prediction(self, prediction_id: str) -> Optional[FeedbackEntry]:
         """Get feedback for a specific prediction"""
-        try:
-            feedback_data = self._load_feedback()
-            
-            for entry in feedback_data:
-                if entry['prediction_id'] == prediction_id:
-                    return FeedbackEntry(**entry)
-            
-            return None
-            
-        except Exception as e:
-            self.logger.error(f"Error getting feedback by prediction: {e}")
-            return None
+        entries = self._get_index('prediction_id').get(prediction_id)
+        return self._to_entry(entries[0]) if entries else None
     
+    @_log_errors("getting feedback by trial", fallback=list)
     def get_feedback_by_trial(self, trial_id: str) -> List[FeedbackEntry]:
         """Get all feedback for a specific trial"""
-        try:
-            feedback_data = self._load_feedback()
-            
-            trial_feedback = []
-            for entry in feedback_data:
-                if entry['trial_id'] == trial_id:
-                    trial_feedback.append(FeedbackEntry(**entry))
-            
-            return trial_feedback
-            
-        except Exception as e:
-            self.logger.error(f"Error getting feedback by trial: {e}")
-            return []
+        return [self._to_entry(entry) for entry in self._get_index('trial_id').get(trial_id, [])]
     
+    @_log_errors("getting feedback by user", fallback=list)
     def get_feedback_by_user(self, user_id: str) -> List[FeedbackEntry]:
         """Get all feedback from a specific user"""
-        try:
-            feedback_data = self._load_feedback()
-            
-            user_feedback = []
-            for entry in feedback_data:
-                if entry['user_id'] == user_id:
-                    user_feedback.append(FeedbackEntry(**entry))
-            
-            return user_feedback
-            
-        except Exception as e:
-            self.logger.error(f"Error getting feedback by user: {e}")
-            return []
+        return [self._to_entry(entry) for entry in self._get_index('user_id').get(user_id, [])]
     
+    @_log_errors("getting feedback statistics", fallback=dict)
     def get_feedback_statistics(self) -> Dict[str, Any]:
         """Get statistics about collected feedback"""
-        try:
-            feedback_data = self._load_feedback()
-            
-            if not feedback_data:
-                return {
-                    'total_feedback': 0,
-                    'feedback_types': {},
-                    'average_confidence': 0.0,
-                    'recent_feedback': 0
-                }
-            
-            # Count feedback types
-            feedback_types = {}
-            confidence_scores = []
-            recent_count = 0
-            
-            for entry in feedback_data:
-                # Count feedback types
-                feedback_type = entry['feedback_type']
-                feedback_types[feedback_type] = feedback_types.get(feedback_type, 0) + 1
-                
-                # Collect confidence scores
-                confidence_scores.append(entry['confidence_score'])
-                
-                # Count recent feedback (last 7 days)
-                timestamp = datetime.fromisoformat(entry['timestamp'])
-                if (datetime.now() - timestamp).days <= 7:
-                    recent_count += 1
-            
+        feedback_data = self._load_feedback()
+        
+        if not feedback_data:
             return {
-                'total_feedback': len(feedback_data),
-                'feedback_types': feedback_types,
-                'average_confidence': sum(confidence_scores) / len(confidence_scores) if confidence_scores else 0.0,
-                'recent_feedback': recent_count
+                'total_feedback': 0,
+                'feedback_types': {},
+                'average_confidence': 0.0,
+                'recent_feedback': 0
             }
+        
+        # Count feedback types
+        feedback_types = {}
+        confidence_scores = []
+        recent_count = 0
+        now = datetime.now()
+        
+        for entry in feedback_data:
+            # Count feedback types
+            feedback_type = entry['feedback_type']
+            feedback_types[feedback_type] = feedback_types.get(feedback_type, 0) + 1
             
-        except Exception as e:
-            self.logger.error(f"Error getting feedback statistics: {e}")
-            return {}
+            # Collect confidence scores
+            confidence_scores.append(entry['confidence_score'])
+            
+            # Count recent feedback (last 7 days)
+            timestamp = datetime.fromisoformat(entry['timestamp'])
+            if (now - timestamp).days <= 7:
+                recent_count += 1
+        
+        return {
+            'total_feedback': len(feedback_data),
+            'feedback_types': feedback_types,
+            'average_confidence': sum(confidence_scores) / len(confidence_scores) if confidence_scores else 0.0,
+            'recent_feedback': recent_count
+        }
     
-    def _load_feedback(self) -> List[Dict]:
-        """Load feedback data from file"""
+    @contextmanager
+    def _file_lock(self):
+        """Hold an exclusive flock on the store's sidecar lock file, where supported"""
+        if fcntl is None:
+            yield
+            return
+        
+        self._lock_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(self._lock_file, 'a') as lock:
+            fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+    
+    @staticmethod
+    def _to_entry(entry: Dict) -> FeedbackEntry:
+        """Build a FeedbackEntry that shares no mutable state with the cache"""
+        return FeedbackEntry(**copy.deepcopy(entry))
+    
+    def _file_stat(self) -> Optional[tuple]:
+        """Return the (inode, mtime_ns, size) of the feedback file, or None if missing"""
         try:
-            if not self.feedback_file.exists():
-                return []
-            
-            with open(self.feedback_file, 'r') as f:
-                return json.load(f)
-                
-        except Exception as e:
-            self.logger.error(f"Error loading feedback: {e}")
-            return []
+            stat = self.feedback_file.stat()
+        except FileNotFoundError:
+            return None
+        # Every save os.replace()s a new file, so the inode changes even when
+        # another process writes within the same mtime tick
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+    
+    @_log_errors("loading feedback", fallback=list)
+    def _load_feedback(self) -> List[Dict]:
+        """
+        Load feedback data from file, reusing the parsed copy while the file is unchanged
+        
+        The returned list is new, but its entry dicts are the cached ones and
+        must not be mutated; public getters hand out copies via _to_entry.
+        """
+        return self._read_feedback()
     
+    def _read_feedback(self) -> List[Dict]:
+        """Like _load_feedback, but raises instead of returning [] when the file can't be read"""
+        with self._lock:
+            self._refresh_cache()
+            return list(self._cached_feedback or [])
+    
+    def _refresh_cache(self):
+        """Re-read the feedback file if it changed since it was cached; caller holds _lock"""
+        file_stat = self._file_stat()
+        if file_stat is None:
+            self._cached_feedback = self._cached_stat = self._indexes = None
+        elif file_stat != self._cached_stat:
+            if orjson is not None:
+                with open(self.feedback_file, 'rb') as f:
+                    self._cached_feedback = orjson.loads(f.read())
+            else:
+                with open(self.feedback_file, 'r', encoding='utf-8') as f:
+                    self._cached_feedback = json.load(f)
+            self._cached_stat = file_stat
+            self._indexes = None
+    
+    def _get_index(self, field: str) -> Dict[str, List[Dict]]:
+        """Return entries grouped by the given indexed field, rebuilt when the data changes"""
+        with self._lock:
+            self._refresh_cache()
+            if self._indexes is None:
+                indexes = {name: {} for name in self.INDEXED_FIELDS}
+                for entry in self._cached_feedback or []:
+                    for name, index in indexes.items():
+                        # Entries missing a field are just left out of that index
+                        key = entry.get(name)
+                        if key is not None:
+                            index.setdefault(key, []).append(entry)
+                self._indexes = indexes
+            return self._indexes[field]
+    
+    @_log_errors("saving feedback", reraise=True)
     def _save_feedback(self, feedback_data: List[Dict]):
         """Save feedback data to file"""
+        # Write to a sibling temp file and swap it in, so concurrent readers
+        # see either the old or the new file, never a partial write. The temp
+        # name is unique per save so concurrent writers never share one.
+        fd, tmp_file = tempfile.mkstemp(
+            dir=self.feedback_file.parent, prefix=f".{self.feedback_file.name}.", suffix=".tmp"
+        )
         try:
-            with open(self.feedback_file, 'w') as f:
-                json.dump(feedback_data, f, indent=2)
-                
-        except Exception as e:
-            self.logger.error(f"Error saving feedback: {e}")
+            if orjson is not None:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(orjson.dumps(feedback_data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+            else:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(feedback_data, f, indent=2)
+            # mkstemp creates the file 0600; keep the store's existing permissions
+            try:
+                mode = self.feedback_file.stat().st_mode & 0o777
+            except FileNotFoundError:
+                mode = 0o644
+            os.chmod(tmp_file, mode)
+            os.replace(tmp_file, self.feedback_file)
+        except BaseException:
+            try:
+                os.unlink(tmp_file)
+            except FileNotFoundError:
+                pass
             raise
+        
+        with self._lock:
+            self._cached_feedback = list(feedback_data)
+            self._cached_stat = self._file_stat()
+            self._indexes = None
@@ -9,6 +9,8 @@ from typing import List, Dict
 API_HOST = "0.0.0.0"
 API_PORT = 8000
 API_DEBUG = True
+API_WORKERS = 4  # uvicorn worker processes when run as a script
+MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # bytes; larger request bodies are rejected
 
 # Data Collection Settings
 CLINICAL_TRIALS_GOV_API_URL = "https://clinicaltrials.gov/api/query/study_fields"
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Test Feedback API
+Tests the feedback routes through the FastAPI test client
+"""
+
+import sys
+import os
+import tempfile
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from ayusynapse.api import feedback_api
+from ayusynapse.models.feedback.feedback_collector import FeedbackCollector
+
+def make_feedback(prediction_id: str, feedback_type: str = "correct") -> dict:
+    return {
+        "prediction_id": prediction_id,
+        "trial_id": "NCT07062263",
+        "patient_id": "patient-001",
+        "confidence_score": 0.85,
+        "user_id": "doctor-batch",
+        "feedback_type": feedback_type,
+        "metadata": {"source": "test"}
+    }
+
+class TestFeedbackAPI:
+    """Test the feedback router mounted on an app"""
+
+    def setup_method(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.feedback_collector = FeedbackCollector(os.path.join(self.temp_dir.name, "feedback.json"))
+
+        app = FastAPI()
+        app.include_router(feedback_api.router)
+        app.dependency_overrides[feedback_api.get_feedback_collector] = lambda: self.feedback_collector
+        self.client = TestClient(app)
+
+    def teardown_method(self):
+        self.temp_dir.cleanup()
+
+    def test_collect_batch(self):
+        """Test a batch is stored and its ids come back in order"""
+        batch = [make_feedback("pred-b1"), make_feedback("pred-b2", "incorrect"), make_feedback("pred-b3")]
+
+        response = self.client.post("/feedback/collect_batch", json=batch)
+
+        assert response.status_code == 200
+        result = response.json()
+        assert result["status"] == "success"
+        assert len(result["feedback_ids"]) == len(batch)
+
+        stored = self.feedback_collector.get_feedback_by_user("doctor-batch")
+        assert [entry.feedback_id for entry in stored] == result["feedback_ids"]
+        assert [entry.prediction_id for entry in stored] == ["pred-b1", "pred-b2", "pred-b3"]
+        assert stored[0].metadata == {"source": "test"}
+
+        response = self.client.get("/feedback/prediction/pred-b2")
+        assert response.status_code == 200
+        assert response.json()["feedback_type"] == "incorrect"
+
+    def test_collect_empty_batch(self):
+        """Test an empty batch stores nothing"""
+        response = self.client.post("/feedback/collect_batch", json=[])
+
+        assert response.status_code == 200
+        assert response.json()["feedback_ids"] == []
+        assert self.feedback_collector.get_feedback_statistics()["total_feedback"] == 0
+
+    def test_collect_batch_validation(self):
+        """Test an invalid entry rejects the whole batch"""
+        batch = [make_feedback("pred-b1"), {**make_feedback("pred-b2"), "confidence_score": 1.5}]
+
+        response = self.client.post("/feedback/collect_batch", json=batch)
+
+        assert response.status_code == 422
+        assert self.feedback_collector.get_feedback_by_user("doctor-batch") == []
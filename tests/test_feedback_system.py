@@ -6,6 +6,7 @@ import sys
 import os
 import json
 import logging
+import tempfile
 from datetime import datetime
 
 # Add the project root to the path
@@ -112,6 +113,132 @@ def test_feedback_collection():
     
     return feedback_collector
 
+def test_feedback_batch_collection():
+    """Test collecting several feedback entries in one batch"""
+    print("🧪 Testing Batch Feedback Collection")
+    print("=" * 50)
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        feedback_collector = FeedbackCollector(os.path.join(tmp_dir, "batch_feedback.json"))
+        
+        batch = [
+            {
+                "prediction_id": f"batch-pred-{i:03d}",
+                "trial_id": "NCT07062263",
+                "patient_id": f"batch-patient-{i:03d}",
+                "confidence_score": 0.5 + i * 0.1,
+                "user_id": "doctor-batch",
+                "feedback_type": "correct"
+            }
+            for i in range(3)
+        ]
+        
+        feedback_ids = feedback_collector.collect_feedback_batch(batch)
+        assert len(feedback_ids) == len(batch)
+        assert len(set(feedback_ids)) == len(batch)
+        
+        for i, feedback_id in enumerate(feedback_ids):
+            feedback = feedback_collector.get_feedback_by_prediction(f"batch-pred-{i:03d}")
+            assert feedback is not None
+            assert feedback.feedback_id == feedback_id
+            assert feedback.comments is None
+        
+        user_feedback = feedback_collector.get_feedback_by_user("doctor-batch")
+        assert len(user_feedback) == len(batch)
+        
+        # An empty batch doesn't touch the file
+        mtime_ns = os.stat(feedback_collector.feedback_file).st_mtime_ns
+        assert feedback_collector.collect_feedback_batch([]) == []
+        assert os.stat(feedback_collector.feedback_file).st_mtime_ns == mtime_ns
+        print(f"✅ Collected {len(feedback_ids)} feedback entries in one batch")
+
+def test_feedback_cache_isolation():
+    """Test that returned entries don't alias the in-memory cache and external edits are picked up"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        feedback_file = os.path.join(tmp_dir, "cache_feedback.json")
+        feedback_collector = FeedbackCollector(feedback_file)
+        feedback_collector.collect_feedback(
+            prediction_id="cache-pred-001",
+            trial_id="NCT07062263",
+            patient_id="cache-patient-001",
+            confidence_score=0.8,
+            user_id="doctor-cache",
+            feedback_type="correct",
+            suggested_corrections={"criteria": ["age"]},
+            metadata={"source": "ui"}
+        )
+        
+        # Mutating the caller's own dicts after collection must not leak either
+        caller_metadata = {"source": "ui"}
+        feedback_collector.collect_feedback(
+            prediction_id="cache-pred-003",
+            trial_id="NCT12345678",
+            patient_id="cache-patient-003",
+            confidence_score=0.6,
+            user_id="doctor-other",
+            feedback_type="partial",
+            metadata=caller_metadata
+        )
+        caller_metadata["source"] = "MUTATED"
+        assert feedback_collector.get_feedback_by_prediction("cache-pred-003").metadata == {"source": "ui"}
+        
+        # Mutating a returned entry must not leak into later reads
+        feedback = feedback_collector.get_feedback_by_prediction("cache-pred-001")
+        feedback.metadata["x"] = 1
+        feedback.suggested_corrections["criteria"].append("ecog")
+        feedback_collector.get_feedback_by_trial("NCT07062263")[0].metadata["y"] = 2
+        
+        reloaded = feedback_collector.get_feedback_by_prediction("cache-pred-001")
+        assert reloaded.metadata == {"source": "ui"}
+        assert reloaded.suggested_corrections == {"criteria": ["age"]}
+        
+        # An external edit to the file replaces the cached copy
+        with open(feedback_file, 'r', encoding='utf-8') as f:
+            stored = json.load(f)
+        stored[0]["metadata"] = {"source": "edited externally"}
+        stored.append(dict(stored[0], feedback_id="external-001", prediction_id="cache-pred-002"))
+        with open(feedback_file, 'w', encoding='utf-8') as f:
+            json.dump(stored, f, indent=2)
+        
+        assert feedback_collector.get_feedback_by_prediction("cache-pred-001").metadata == {"source": "edited externally"}
+        assert feedback_collector.get_feedback_by_prediction("cache-pred-002").feedback_id == "external-001"
+        assert len(feedback_collector.get_feedback_by_user("doctor-cache")) == 2
+
+def test_feedback_index_refresh():
+    """Test that lookups see newly collected feedback and tolerate incomplete legacy entries"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        feedback_file = os.path.join(tmp_dir, "index_feedback.json")
+        
+        # A legacy entry without a user_id must not break lookups of other entries
+        with open(feedback_file, 'w', encoding='utf-8') as f:
+            json.dump([{"feedback_id": "legacy-001", "prediction_id": "legacy-pred", "trial_id": "NCT07062263"}], f)
+        
+        feedback_collector = FeedbackCollector(feedback_file)
+        feedback_collector.collect_feedback(
+            prediction_id="index-pred-001",
+            trial_id="NCT07062263",
+            patient_id="index-patient-001",
+            confidence_score=0.9,
+            user_id="doctor-index",
+            feedback_type="correct"
+        )
+        
+        assert feedback_collector.get_feedback_by_prediction("index-pred-001").user_id == "doctor-index"
+        assert len(feedback_collector.get_feedback_by_user("doctor-index")) == 1
+        
+        # The index is rebuilt after each collection
+        feedback_collector.collect_feedback(
+            prediction_id="index-pred-002",
+            trial_id="NCT07062263",
+            patient_id="index-patient-002",
+            confidence_score=0.4,
+            user_id="doctor-index",
+            feedback_type="incorrect"
+        )
+        
+        assert feedback_collector.get_feedback_by_prediction("index-pred-002").feedback_type == "incorrect"
+        assert len(feedback_collector.get_feedback_by_user("doctor-index")) == 2
+
 def test_feedback_ui():
     """Test the feedback UI functionality"""
     print("\n🖥️ Testing Feedback UI")
@@ -261,6 +388,15 @@ def main():
         # Test feedback collection
         feedback_collector = test_feedback_collection()
         
+        # Test batch feedback collection
+        test_feedback_batch_collection()
+        
+        # Test feedback cache isolation
+        test_feedback_cache_isolation()
+        
+        # Test feedback index refresh
+        test_feedback_index_refresh()
+        
         # Test feedback UI
         test_feedback_ui()
         
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Test FHIR Transaction Bundle
+Tests building a server transaction bundle from a converter collection bundle
+"""
+
+import copy
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ayusynapse.fhir.converter import FHIRConverter
+from ayusynapse.fhir.fhir_server_integration import FHIRServerIntegration
+
+SAMPLE_TRIAL = {
+    'trial_id': 'NCT00000001',
+    'all_entities': [
+        {'entity_type': 'CONDITION', 'text': 'breast cancer', 'value': None,
+         'resource_type': 'Condition', 'confidence': 0.9},
+        {'entity_type': 'LAB', 'text': 'hemoglobin', 'value': '13 g/dL',
+         'resource_type': 'Observation', 'confidence': 0.8}
+    ]
+}
+
+class TestTransactionBundle:
+    """Test FHIRServerIntegration.build_transaction_bundle"""
+
+    def setup_method(self):
+        self.fhir_bundle = FHIRConverter().convert_trial_to_fhir(SAMPLE_TRIAL)
+        self.patient_id = self.fhir_bundle['entry'][0]['resource']['id']
+
+    def test_transaction_entries(self):
+        """Test entries are POSTs without ids"""
+        transaction = FHIRServerIntegration.build_transaction_bundle(self.fhir_bundle)
+
+        assert transaction['resourceType'] == 'Bundle'
+        assert transaction['type'] == 'transaction'
+        assert len(transaction['entry']) == len(self.fhir_bundle['entry'])
+
+        for entry in transaction['entry']:
+            assert 'id' not in entry['resource'], "Server assigns ids on create"
+            assert entry['request'] == {'method': 'POST', 'url': entry['resource']['resourceType']}
+
+    def test_patient_references(self):
+        """Test the Patient gets a urn:uuid fullUrl and subjects point at it"""
+        transaction = FHIRServerIntegration.build_transaction_bundle(self.fhir_bundle)
+        patient_url = f"urn:uuid:{self.patient_id}"
+
+        patient_entries = [entry for entry in transaction['entry']
+                           if entry['resource']['resourceType'] == 'Patient']
+        assert len(patient_entries) == 1
+        assert patient_entries[0]['fullUrl'] == patient_url
+
+        subject_entries = [entry for entry in transaction['entry'] if 'subject' in entry['resource']]
+        assert subject_entries, "Sample bundle should contain resources with a subject"
+        for entry in subject_entries:
+            assert entry['resource']['subject']['reference'] == patient_url
+
+    def test_input_bundle_unchanged(self):
+        """Test the converter bundle is not modified"""
+        original = copy.deepcopy(self.fhir_bundle)
+
+        FHIRServerIntegration.build_transaction_bundle(self.fhir_bundle)
+
+        assert self.fhir_bundle == original
+        assert self.fhir_bundle['entry'][1]['resource']['subject']['reference'] == f"Patient/{self.patient_id}"
+
+if __name__ == "__main__":
+    test_instance = TestTransactionBundle()
+    for test in (test_instance.test_transaction_entries,
+                 test_instance.test_patient_references,
+                 test_instance.test_input_bundle_unchanged):
+        test_instance.setup_method()
+        test()
+
+    print("✅ All transaction bundle tests passed!")
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Test Match API
+Tests the request size limit and the /match endpoint through the FastAPI test client
+"""
+
+import json
+import shutil
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+
+from ayusynapse.api import match_api
+
+# Trial data the local retrieval step reads from the working directory
+TRIAL_DATA_FILE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    'ayusynapse', 'data', 'processed', 'extracted_criteria_data.json'
+)
+
+# HER2+ biliary tract cancer patient, as in the CLI sample
+PATIENT_BUNDLE = {
+    "resourceType": "Bundle",
+    "type": "collection",
+    "entry": [
+        {
+            "resource": {
+                "resourceType": "Patient",
+                "id": "patient-1",
+                "gender": "female",
+                "birthDate": "1971-01-01"
+            }
+        },
+        {
+            "resource": {
+                "resourceType": "Condition",
+                "id": "condition-1",
+                "subject": {"reference": "Patient/patient-1"},
+                "code": {
+                    "coding": [{"system": "http://snomed.info/sct", "code": "363418001", "display": "Biliary tract cancer"}],
+                    "text": "Biliary tract cancer"
+                }
+            }
+        },
+        {
+            "resource": {
+                "resourceType": "Observation",
+                "id": "observation-1",
+                "subject": {"reference": "Patient/patient-1"},
+                "code": {
+                    "coding": [{"system": "http://loinc.org", "code": "85319-0", "display": "HER2"}],
+                    "text": "HER2"
+                },
+                "valueCodeableConcept": {"text": "positive"},
+                "status": "final"
+            }
+        }
+    ]
+}
+
+class TestMatchAPI:
+    """Test the match API request handling"""
+
+    def setup_method(self):
+        self.client = TestClient(match_api.app)
+
+    def test_oversized_request_rejected(self, monkeypatch):
+        """Test bodies over MAX_CONTENT_LENGTH get a 413 without reaching the endpoint"""
+        monkeypatch.setattr(match_api, "MAX_CONTENT_LENGTH", 1024)
+        body = json.dumps({"patient": {"bundle": {"padding": "x" * 2048}}})
+
+        response = self.client.post("/match", content=body, headers={"Content-Type": "application/json"})
+
+        assert response.status_code == 413
+        assert "1024" in response.json()["detail"]
+
+    def test_normal_request_matches(self, monkeypatch, tmp_path):
+        """Test a normal-size /match request still evaluates trials"""
+        shutil.copy(TRIAL_DATA_FILE, tmp_path / 'extracted_criteria_data.json')
+        monkeypatch.chdir(tmp_path)
+        # The shared ranker keeps trials scoring 60+, above any retrieval score this patient gets
+        monkeypatch.setattr(match_api.ranker, "min_score", 0.0)
+
+        response = self.client.post("/match", json={
+            "patient": {"bundle": PATIENT_BUNDLE, "patient_id": "patient-1"},
+            "top_k": 5,
+            "include_explanations": False
+        })
+
+        assert response.status_code == 200
+        result = response.json()
+        assert result["patient_id"] == "patient-1"
+        assert result["total_trials_evaluated"] == 22
+        assert len(result["top_trials"]) == 5
+        assert result["prediction_id"]
+        for trial in result["top_trials"]:
+            assert trial["prediction_id"] == result["prediction_id"]
+            assert trial["confidence_score"] is not None